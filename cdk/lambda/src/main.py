@@ -9,6 +9,8 @@ from params import FunctionGuidelines
 from settings import StorageSettings
 from pynamodb_models import GenerationOutputModel
 
+INTERNAL_ATTRIBUTES = {"purpose_embedding"}
+
 
 class FargateSettings(BaseSettings):
     model_config = SettingsConfigDict()
@@ -46,7 +48,13 @@ def handle_get_request(pk: str, sk: str) -> dict:
 
     try:
         item = GenerationOutputModel.get(pk, sk)
-        return create_response(200, item.attribute_values)
+        # the reuse embedding is internal and large, so it isn't sent to the UI
+        output = {
+            key: value
+            for key, value in item.attribute_values.items()
+            if key not in INTERNAL_ATTRIBUTES
+        }
+        return create_response(200, output)
     except DoesNotExist:
         return create_response(
             404, {"error": f"No item found with pk={pk} and sk={sk}"}
@@ -0,0 +1,154 @@
+import logging, os, argparse, json, shlex, time
+from datetime import datetime
+from pathlib import Path
+from src.config.settings import Settings
+from src.chroma_interface import ExperimentVrClient
+from src.developer_agent import DeveloperAgent
+from src.ingestion_agent import IngestionAgent
+from src.models.params import GenerationParams
+from src.concurrency import map_concurrently
+
+
+logger = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO)
+
+METRICS = ["wall_time", "llm_calls", "prompt_tokens", "completion_tokens", "output_chars"]
+
+
+def load_cases(path: str, timestamp: str) -> list[GenerationParams]:
+    """Load test cases from a JSONL manifest or a directory of test case scripts."""
+    path = Path(path)
+    if path.suffix == ".jsonl":
+        with open(path, "r") as f:
+            records = [json.loads(line) for line in f if line.strip()]
+    else:
+        records = []
+        for script in sorted(path.glob("*.sh")):
+            exports = {}
+            for line in script.read_text().splitlines():
+                if line.startswith("export "):
+                    key, _, value = shlex.split(line)[1].partition("=")
+                    exports[key.lower()] = value
+            if {"name", "purpose", "services"} <= exports.keys():
+                exports["services"] = json.loads(exports["services"])
+                records.append(exports)
+
+    return [
+        GenerationParams(
+            name=record["name"],
+            purpose=record["purpose"],
+            services=record["services"],
+            timestamp=timestamp,
+        )
+        for record in records
+    ]
+
+
+def run_case(
+    generation_params: GenerationParams, chroma_client: ExperimentVrClient
+) -> dict:
+    da = DeveloperAgent(generation_params, chroma_client=chroma_client)
+    start_time = time.time()
+    result = da.generate_with_cb()
+    wall_time = time.time() - start_time
+
+    stages = da.tracer.summary()
+    main_plan = getattr(da, "main_plan", None)
+    return {
+        "name": generation_params.name,
+        "wall_time": round(wall_time, 3),
+        "llm_calls": sum(stage["llm_calls"] for stage in stages.values()),
+        "prompt_tokens": sum(stage["prompt_tokens"] for stage in stages.values()),
+        "completion_tokens": sum(stage["completion_tokens"] for stage in stages.values()),
+        "cache_hits": sum(stage["cache_hits"] for stage in stages.values()),
+        "retries": sum(stage["retries"] for stage in stages.values()),
+        "reuse_hits": (
+            sum(subfunction.reusable for subfunction in main_plan.list_of_subfunctions)
+            if main_plan
+            else 0
+        ),
+        "output_chars": len(result.function_code),
+        "output_lines": len(result.function_code.splitlines()),
+        "stage_times": {name: stage["duration"] for name, stage in stages.items()},
+    }
+
+
+def find_regressions(report: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Metrics of each case that grew more than tolerance over the baseline."""
+    baseline_cases = {case["name"]: case for case in baseline["cases"]}
+    regressions = []
+    for case in report["cases"]:
+        previous = baseline_cases.get(case["name"])
+        if previous is None:
+            continue
+        for metric in METRICS:
+            if previous.get(metric) and case[metric] > previous[metric] * (1 + tolerance):
+                regressions.append(
+                    f"{case['name']}: {metric} {previous[metric]} -> {case[metric]}"
+                )
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark generation over the test cases")
+    parser.add_argument("--cases", default="scripts/test_cases")
+    parser.add_argument("--output", default="./tmp/benchmarks/report.json")
+    parser.add_argument("--baseline", help="Report to compare against")
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.15)
+    parser.add_argument("-c", "--concurrency", type=int, default=1)
+    parser.add_argument("--provider-mode", choices=["live", "record", "replay"])
+    parser.add_argument(
+        "--skip-download", action="store_true", help="Use the local Chroma DB as is"
+    )
+    args = parser.parse_args()
+
+    settings = Settings.get_settings()
+    if args.provider_mode:
+        # must happen before the first ModelManager is provisioned
+        settings.model.provider_mode = args.provider_mode
+    # every case must run the full pipeline for the numbers to be comparable
+    settings.generation.checkpoint_enabled = False
+    settings.generation.reuse_similarity_threshold = None
+
+    # a fresh timestamp per run keeps runs from sharing checkpoints or outputs
+    timestamp = f"benchmark {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
+    cases = load_cases(args.cases, timestamp)
+    logger.info(f"Benchmarking {len(cases)} test case(s) from {args.cases}")
+    chroma_client = (
+        ExperimentVrClient()
+        if args.skip_download
+        else IngestionAgent().get_current_chroma_db()
+    )
+
+    start_time = time.time()
+    results = map_concurrently(
+        lambda generation_params: run_case(generation_params, chroma_client),
+        cases,
+        max_workers=args.concurrency,
+    )
+    report = {
+        "provider_mode": settings.model.provider_mode,
+        "concurrency": args.concurrency,
+        "total_wall_time": round(time.time() - start_time, 3),
+        "cases": results,
+    }
+
+    Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+    Path(args.output).write_text(json.dumps(report, indent=2))
+    logger.info(f"Benchmark report written to {args.output}")
+
+    regressions = []
+    if args.baseline and os.path.exists(args.baseline):
+        with open(args.baseline, "r") as f:
+            regressions = find_regressions(report, json.load(f), args.tolerance)
+        for regression in regressions:
+            logger.warning(f"Regression: {regression}")
+
+    if args.baseline and args.update_baseline:
+        Path(args.baseline).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.baseline).write_text(json.dumps(report, indent=2))
+        logger.info(f"Baseline updated at {args.baseline}")
+
+    if regressions and not args.update_baseline:
+        raise SystemExit(1)
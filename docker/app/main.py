@@ -1,8 +1,17 @@
-import logging, os, argparse, boto3, subprocess
+import logging, os, argparse, boto3, subprocess, json
+from concurrent.futures import Future
+from datetime import datetime
+from typing import Union
 from src.developer_agent import DeveloperAgent
 from src.ingestion_agent import IngestionAgent
 from src.models.pynamodb_models import GenerationOutputModel
 from src.models.code_outputs import CombinedOutput
+from src.models.params import GenerationParams
+from src.chroma_interface import ExperimentVrClient
+from src.config.model_manager import ModelManager
+from src.config.settings import Settings
+from src.services.generation_history import GenerationHistory
+from src.concurrency import map_concurrently, run_in_background
 from pynamodb.exceptions import PutError
 
 
@@ -10,7 +19,9 @@ logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
 
 
-def write_generation_output(name: str, timestamp: str, combined_output: CombinedOutput):
+def write_generation_output(
+    name: str, timestamp: str, combined_output: CombinedOutput, **metadata
+):
     try:
         output = GenerationOutputModel(
             pk=name,
@@ -19,30 +30,109 @@ def write_generation_output(name: str, timestamp: str, combined_output: Combined
             commentary=combined_output.commentary,
             sample_usage_python=combined_output.sample_usage_python,
             sample_usage_chaos_toolkit=combined_output.sample_usage_chaos_toolkit,
+            **metadata,
         )
 
         output.save()
+        GenerationHistory.remember((name, timestamp), metadata.get("purpose_embedding"))
         print("Data saved successfully!")
     except PutError as e:
         print(f"Error saving data: {e}")
 
 
+def load_batch(manifest_path: str) -> list[GenerationParams]:
+    """Read one GenerationParams per JSONL record, defaulting the timestamp.
+
+    Records sharing a name and timestamp would overwrite each other's output and
+    checkpoints, so they are rejected.
+    """
+    timestamp = os.getenv("TIMESTAMP") or datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    batch, seen = [], set()
+    with open(manifest_path, "r") as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            record.setdefault("timestamp", timestamp)
+            generation_params = GenerationParams(**record)
+            key = (generation_params.name, generation_params.timestamp)
+            if key in seen:
+                raise ValueError(
+                    f"Duplicate record for name '{key[0]}' and timestamp '{key[1]}' on line {line_number} of {manifest_path}"
+                )
+            seen.add(key)
+            batch.append(generation_params)
+    return batch
+
+
+def generate_batch(
+    manifest_path: str,
+    chroma_client: Union[ExperimentVrClient, "Future[ExperimentVrClient]"],
+    concurrency: int,
+) -> int:
+    """Generate every record of the manifest and return the number that failed."""
+    batch = load_batch(manifest_path)
+    logger.info(f"Generating {len(batch)} function(s) from {manifest_path}")
+
+    def generate_one(generation_params: GenerationParams) -> bool:
+        try:
+            da = DeveloperAgent(generation_params, chroma_client=chroma_client)
+            result = da.generate_with_cb()
+            write_generation_output(
+                generation_params.name,
+                generation_params.timestamp,
+                result,
+                **da.output_metadata(),
+            )
+            return True
+        except Exception as e:
+            logger.error(f"Generation failed for {generation_params.name}: {e}")
+            return False
+
+    succeeded = map_concurrently(generate_one, batch, max_workers=concurrency)
+    logger.info(f"Batch complete: {sum(succeeded)}/{len(batch)} succeeded")
+    return len(batch) - sum(succeeded)
+
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument("choice", choices=["ingest", "generate"])
     parser.add_argument("-s", "--summary", action="store_true")
+    parser.add_argument(
+        "-b", "--batch", help="JSONL manifest of generation requests (generate only)"
+    )
+    parser.add_argument(
+        "-c", "--concurrency", type=int, help="Concurrent generations in batch mode"
+    )
     args = parser.parse_args()
     ia = IngestionAgent()
+    failed = 0
 
     if args.choice == "ingest":
         logger.info("Begining Ingestion Agent...")
         result = ia.ingest()
 
     elif args.choice == "generate":
-        ia.get_current_chroma_db()
+        # download the vector DB while the models are provisioned and planning starts
+        chroma_client = run_in_background(ia.get_current_chroma_db)
         logger.info("Begin AP Developer")
-        da = DeveloperAgent()
-        result = da.generate_with_cb()
-        write_generation_output(
-            da.generation_params.name, da.generation_params.timestamp, result
-        )
+        if args.batch:
+            failed = generate_batch(
+                args.batch,
+                chroma_client,
+                args.concurrency or Settings.get_settings().generation.batch_concurrency,
+            )
+        else:
+            da = DeveloperAgent(chroma_client=chroma_client)
+            result = da.generate_with_cb()
+            write_generation_output(
+                da.generation_params.name,
+                da.generation_params.timestamp,
+                result,
+                **da.output_metadata(),
+            )
+
+    ModelManager.get_instance().sync_caches()
+    if failed:
+        # let callers detect a partially failed batch
+        raise SystemExit(1)
@@ -1,9 +1,12 @@
 import logging
+import numpy as np
+from typing import Tuple, Union
 from langchain_core.embeddings import Embeddings
 from langchain_chroma import Chroma
 from langchain_core.documents import Document
 from src.config.model_manager import ModelManager
 from src.config.settings import Settings
+from src.utils import normalize_rows
 
 logger = logging.getLogger(__name__)
 
@@ -39,6 +42,110 @@ class CodebaseChroma(Chroma):
 
         self.add_texts(texts, metadatas, ids)
 
+    def is_empty(self) -> bool:
+        return not self._collection.count()
+
+    @staticmethod
+    def _similarity_matrix(embeddings: list[list[float]]) -> np.ndarray:
+        """Pairwise cosine similarities of embeddings."""
+        vectors = normalize_rows(embeddings)
+        return vectors @ vectors.T
+
+    def relevant_search(
+        self,
+        queries: Union[str, list[str]],
+        score_threshold: float,
+        fetch_k: int = 20,
+        max_k: int = 8,
+        mmr_lambda: float = 0.7,
+        duplicate_threshold: float = 0.95,
+        rrf_k: int = 60,
+    ) -> list[Tuple[Document, float]]:
+        """Documents relevant to one or more queries, ordered by maximal marginal relevance.
+
+        All queries are embedded in one call and searched together. For each query up
+        to fetch_k nearest documents are scored and those below score_threshold are
+        dropped; the remaining rankings are merged by reciprocal rank fusion. Any
+        document nearly identical (cosine >= duplicate_threshold) to one already
+        selected is skipped. Selection stops at max_k, so the result may be empty.
+        Each document is returned with its best relevance score across queries.
+        """
+        queries = [queries] if isinstance(queries, str) else queries
+        count = self._collection.count()
+        if not count or not queries:
+            logger.info(f" Collection {self.collection_name} is empty")
+            return []
+
+        query_embeddings = (
+            self._embedding_function.embed_documents(queries)
+            if len(queries) > 1
+            else [self._embedding_function.embed_query(queries[0])]
+        )
+        results = self._collection.query(
+            query_embeddings=query_embeddings,
+            n_results=min(fetch_k, count),
+            include=["documents", "metadatas", "distances", "embeddings"],
+        )
+        relevance = self._select_relevance_score_fn()
+
+        # id -> [document, best relevance, embedding, fused rank score]
+        fused = {}
+        for ids, texts, metadatas, distances, embeddings in zip(
+            results["ids"],
+            results["documents"],
+            results["metadatas"],
+            results["distances"],
+            results["embeddings"],
+        ):
+            rank = 0
+            for id, text, metadata, distance, embedding in zip(
+                ids, texts, metadatas, distances, embeddings
+            ):
+                score = relevance(distance)
+                if score < score_threshold:
+                    continue
+                rank += 1
+                entry = fused.setdefault(
+                    id,
+                    [Document(page_content=text, metadata=metadata or {}), score, embedding, 0.0],
+                )
+                entry[1] = max(entry[1], score)
+                entry[3] += 1 / (rrf_k + rank)
+
+        candidates = sorted(fused.values(), key=lambda entry: entry[3], reverse=True)
+        for doc, score, _, fused_score in candidates:
+            logger.info(
+                f" Retrieval candidate {doc.metadata.get('path')} scored {score:.3f} (fused {fused_score:.4f})"
+            )
+        if not candidates:
+            return []
+        top_fused = candidates[0][3]
+
+        similarity = self._similarity_matrix([entry[2] for entry in candidates])
+        relevance_terms = mmr_lambda * np.array([entry[3] for entry in candidates]) / top_fused
+        # highest similarity of each candidate to anything selected so far
+        redundancy = np.zeros(len(candidates))
+        remaining = np.ones(len(candidates), dtype=bool)
+
+        selected = []
+        while len(selected) < max_k:
+            remaining &= redundancy < duplicate_threshold
+            if not remaining.any():
+                break
+            values = np.where(
+                remaining, relevance_terms - (1 - mmr_lambda) * redundancy, -np.inf
+            )
+            best_index = int(np.argmax(values))
+            redundancy = (
+                np.maximum(redundancy, similarity[best_index])
+                if selected
+                else similarity[best_index]
+            )
+            selected.append(candidates[best_index])
+            remaining[best_index] = False
+
+        return [(doc, score) for doc, score, _, _ in selected]
+
 
 class ExperimentVrClient(CodebaseChroma):
     collection_name = "experimentvr"
@@ -0,0 +1,68 @@
+import logging
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+
+class PatchError(ValueError):
+    """Raised when a patch cannot be applied to the source it was written against."""
+
+
+def apply_unified_diff(source: str, patch: str) -> str:
+    """Apply a unified diff to source, locating hunks by their content.
+
+    Line numbers in hunk headers are ignored since model written diffs rarely get
+    them right; each hunk's context and removed lines must match the source.
+    """
+    hunks = _parse_hunks(patch)
+    if not hunks:
+        raise PatchError("Patch contains no hunks")
+
+    lines = source.splitlines()
+    position = 0
+    for old, new in hunks:
+        if not old:
+            raise PatchError("Hunk has no context lines to anchor it")
+        index = _find_block(lines, old, position)
+        if index is None:
+            index = _find_block(lines, old, 0)
+        if index is None:
+            raise PatchError(f"Hunk does not match the source: {old[0]!r}")
+        lines[index : index + len(old)] = new
+        position = index + len(new)
+    return "\n".join(lines) + "\n"
+
+
+def _parse_hunks(patch: str) -> list[tuple[list[str], list[str]]]:
+    hunks, old, new, in_hunk = [], [], [], False
+    for line in patch.strip().strip("`").splitlines():
+        if line.startswith("@@"):
+            if in_hunk and (old or new):
+                hunks.append((old, new))
+            old, new, in_hunk = [], [], True
+        elif not in_hunk or line.startswith(("---", "+++", "\\")):
+            continue
+        elif line.startswith("-"):
+            old.append(line[1:])
+        elif line.startswith("+"):
+            new.append(line[1:])
+        else:
+            # context line; models often drop the leading space of blank lines
+            context = line[1:] if line.startswith(" ") else line
+            old.append(context)
+            new.append(context)
+    if in_hunk and (old or new):
+        hunks.append((old, new))
+    return hunks
+
+
+def _find_block(lines: list[str], block: list[str], start: int) -> Optional[int]:
+    """Index of block in lines at or after start, ignoring trailing whitespace."""
+    stripped = [line.rstrip() for line in block]
+    for index in range(start, len(lines) - len(block) + 1):
+        if all(
+            lines[index + offset].rstrip() == expected
+            for offset, expected in enumerate(stripped)
+        ):
+            return index
+    return None
@@ -0,0 +1,267 @@
+import ast
+import builtins
+import logging
+from functools import lru_cache
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+MODULE_NAMES = {"__name__", "__file__", "__doc__", "__spec__", "__package__", "__builtins__"}
+CLIENT_METHODS = {
+    "can_paginate",
+    "close",
+    "generate_presigned_post",
+    "generate_presigned_url",
+    "get_paginator",
+    "get_waiter",
+}
+
+
+def validate_code(code: str, function_signature: Optional[str] = None) -> list[str]:
+    """Run fast local checks on generated code and return human readable findings.
+
+    Covers syntax, undefined names, unused imports, boto3 client methods missing
+    from the botocore service models and, if given, the planned function signature.
+    An empty list means the code is clean.
+    """
+    try:
+        tree = ast.parse(code)
+    except SyntaxError as e:
+        return [f"SyntaxError on line {e.lineno}: {e.msg}"]
+
+    findings = (
+        _undefined_names(tree)
+        + _unused_imports(tree)
+        + _invalid_boto3_calls(tree)
+    )
+    if function_signature:
+        findings += _signature_mismatches(tree, function_signature)
+    return findings
+
+
+def _imported_names(tree: ast.Module) -> dict[str, int]:
+    names = {}
+    for node in ast.walk(tree):
+        if isinstance(node, (ast.Import, ast.ImportFrom)):
+            for alias in node.names:
+                if alias.name != "*":
+                    names[alias.asname or alias.name.split(".")[0]] = node.lineno
+    return names
+
+
+def _loaded_names(tree: ast.Module) -> set[str]:
+    return {
+        node.id
+        for node in ast.walk(tree)
+        if isinstance(node, ast.Name) and isinstance(node.ctx, ast.Load)
+    }
+
+
+def _undefined_names(tree: ast.Module) -> list[str]:
+    """Names that are loaded but never bound anywhere in the module.
+
+    Scoping is deliberately ignored so the check never flags valid code.
+    """
+    if any(
+        isinstance(node, ast.ImportFrom) and any(a.name == "*" for a in node.names)
+        for node in ast.walk(tree)
+    ):
+        return []
+
+    bound = set(dir(builtins)) | MODULE_NAMES | set(_imported_names(tree))
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Name) and not isinstance(node.ctx, ast.Load):
+            bound.add(node.id)
+        elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            bound.add(node.name)
+        elif isinstance(node, ast.arg):
+            bound.add(node.arg)
+        elif isinstance(node, ast.ExceptHandler) and node.name:
+            bound.add(node.name)
+        elif isinstance(node, (ast.Global, ast.Nonlocal)):
+            bound.update(node.names)
+        elif isinstance(node, (ast.MatchAs, ast.MatchStar)) and node.name:
+            bound.add(node.name)
+
+    findings, seen = [], set()
+    for node in ast.walk(tree):
+        if (
+            isinstance(node, ast.Name)
+            and isinstance(node.ctx, ast.Load)
+            and node.id not in bound
+            and node.id not in seen
+        ):
+            seen.add(node.id)
+            findings.append(f"Undefined name '{node.id}' on line {node.lineno}")
+    return findings
+
+
+def _unused_imports(tree: ast.Module) -> list[str]:
+    loaded = _loaded_names(tree)
+    return [
+        f"Unused import '{name}' on line {lineno}"
+        for name, lineno in _imported_names(tree).items()
+        if name not in loaded
+    ]
+
+
+@lru_cache(maxsize=None)
+def _botocore_session():
+    import botocore.session
+
+    return botocore.session.get_session()
+
+
+@lru_cache(maxsize=None)
+def _service_operations(service: str) -> Optional[frozenset]:
+    """snake_case operation names of a service, or None if the service is unknown."""
+    from botocore import xform_name
+
+    session = _botocore_session()
+    if service not in session.get_available_services():
+        return None
+    model = session.get_service_model(service)
+    return frozenset(xform_name(name) for name in model.operation_names)
+
+
+def _client_service(node: ast.AST) -> Optional[str]:
+    """Service name if node is a `<boto3 or session>.client("service", ...)` call."""
+    if (
+        isinstance(node, ast.Call)
+        and isinstance(node.func, ast.Attribute)
+        and node.func.attr == "client"
+        and node.args
+        and isinstance(node.args[0], ast.Constant)
+        and isinstance(node.args[0].value, str)
+    ):
+        return node.args[0].value
+    return None
+
+
+SCOPE_NODES = (ast.FunctionDef, ast.AsyncFunctionDef, ast.Lambda, ast.ClassDef)
+
+
+def _scope_walk(scope: ast.AST):
+    """Nodes in scope, without descending into nested functions or classes."""
+    stack = list(ast.iter_child_nodes(scope))[::-1]
+    while stack:
+        node = stack.pop()
+        yield node
+        if not isinstance(node, SCOPE_NODES):
+            stack.extend(list(ast.iter_child_nodes(node))[::-1])
+
+
+def _scope_clients(scope: ast.AST, enclosing: dict) -> dict:
+    """Names bound to a boto3 client of a single service in scope, or inherited from enclosing.
+
+    A name bound more than once to different services, or also bound to anything
+    else (including a parameter), is left out rather than guessed.
+    """
+    bindings = {}
+    if isinstance(scope, (ast.FunctionDef, ast.AsyncFunctionDef, ast.Lambda)):
+        args = scope.args
+        for arg in args.posonlyargs + args.args + args.kwonlyargs + [args.vararg, args.kwarg]:
+            if arg is not None:
+                bindings.setdefault(arg.arg, set()).add(None)
+    for node in _scope_walk(scope):
+        if isinstance(node, ast.Assign):
+            service = _client_service(node.value) if len(node.targets) == 1 else None
+            for target in node.targets:
+                if isinstance(target, ast.Name):
+                    bindings.setdefault(target.id, set()).add(service)
+
+    clients = dict(enclosing)
+    for name, services in bindings.items():
+        if len(services) == 1 and None not in services:
+            clients[name] = next(iter(services))
+        else:
+            clients.pop(name, None)
+    return clients
+
+
+def _invalid_boto3_calls(tree: ast.Module) -> list[str]:
+    try:
+        _botocore_session()
+    except ImportError:
+        return []
+
+    findings = []
+    for node in ast.walk(tree):
+        service = _client_service(node)
+        if service and _service_operations(service) is None:
+            findings.append(f"Unknown boto3 service '{service}' on line {node.lineno}")
+
+    scopes = [(tree, {})]
+    while scopes:
+        scope, enclosing = scopes.pop(0)
+        clients = _scope_clients(scope, enclosing)
+        for node in _scope_walk(scope):
+            if isinstance(node, SCOPE_NODES):
+                scopes.append((node, clients))
+            elif isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute):
+                findings += _invalid_client_call(node, clients)
+    return findings
+
+
+def _invalid_client_call(node: ast.Call, clients: dict) -> list[str]:
+    owner = node.func.value
+    if isinstance(owner, ast.Name):
+        service = clients.get(owner.id)
+    else:
+        service = _client_service(owner)
+    operations = _service_operations(service) if service else None
+    if operations is None:
+        return []
+
+    method = node.func.attr
+    if method not in operations and method not in CLIENT_METHODS:
+        return [f"boto3 '{service}' client has no method '{method}' (line {node.lineno})"]
+    if (
+        method == "get_paginator"
+        and node.args
+        and isinstance(node.args[0], ast.Constant)
+        and node.args[0].value not in operations
+    ):
+        return [
+            f"boto3 '{service}' client has no operation '{node.args[0].value}' to paginate (line {node.lineno})"
+        ]
+    return []
+
+
+def _parse_signature(function_signature: str) -> Optional[ast.FunctionDef]:
+    signature = function_signature.strip().rstrip(":")
+    if signature.startswith("async "):
+        signature = signature[len("async "):]
+    if not signature.startswith("def "):
+        signature = f"def {signature}"
+    try:
+        node = ast.parse(f"{signature}:\n    ...").body[0]
+    except SyntaxError:
+        logger.info(f" Could not parse planned signature: {function_signature}")
+        return None
+    return node if isinstance(node, ast.FunctionDef) else None
+
+
+def _signature_mismatches(tree: ast.Module, function_signature: str) -> list[str]:
+    planned = _parse_signature(function_signature)
+    if planned is None:
+        return []
+
+    defined = {
+        node.name: node
+        for node in tree.body
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef))
+    }
+    if planned.name not in defined:
+        return [f"Planned function '{planned.name}' is not defined"]
+
+    def parameters(node):
+        args = node.args
+        return [a.arg for a in args.posonlyargs + args.args + args.kwonlyargs]
+
+    expected, actual = parameters(planned), parameters(defined[planned.name])
+    if expected != actual:
+        return [
+            f"Function '{planned.name}' parameters ({', '.join(actual)}) do not match the planned signature ({', '.join(expected)})"
+        ]
+    return []
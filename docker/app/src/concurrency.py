@@ -0,0 +1,115 @@
+import contextvars
+import logging
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Any, Callable, Iterable, Iterator, List, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+def map_concurrently(
+    fn: Callable[[T], R],
+    items: Iterable[T],
+    max_workers: int,
+    timeout: Optional[float] = None,
+    on_error: Optional[Callable[[T, Exception], R]] = None,
+) -> List[R]:
+    """Apply fn to every item on a bounded thread pool, preserving input order.
+
+    Each call runs in a copy of the caller's context, so context-local state such
+    as the LangChain token callbacks is still visible from the worker threads.
+    A call running longer than timeout seconds raises TimeoutError. The call
+    itself keeps running on its thread and the interpreter waits for it at exit,
+    so fn should bound its own blocking work. When on_error is given, a failed
+    call's result is on_error(item, error) instead of raising.
+    """
+    items = list(items)
+    if (max_workers <= 1 or len(items) <= 1) and timeout is None:
+        return [_resolve(item, lambda: fn(item), on_error) for item in items]
+
+    logger.info(f" Running {len(items)} task(s) with concurrency {max_workers}")
+    return list(
+        stream_concurrently(
+            fn,
+            items,
+            max_workers=min(max_workers, len(items)),
+            buffer=len(items),
+            timeout=timeout,
+            on_error=on_error,
+        )
+    )
+
+
+def stream_concurrently(
+    fn: Callable[[T], R],
+    items: Iterable[T],
+    max_workers: int,
+    buffer: int,
+    timeout: Optional[float] = None,
+    on_error: Optional[Callable[[T, Exception], R]] = None,
+) -> Iterator[R]:
+    """Lazily apply fn to items on a thread pool, yielding results in input order.
+
+    At most buffer items are taken from items ahead of the consumer, so a slow
+    consumer applies backpressure all the way up a chain of generators. Calls run
+    in a copy of the caller's context; timeout and on_error behave as in
+    map_concurrently.
+    """
+    started = {}
+
+    def run(index: int, item: T) -> R:
+        started[index] = time.monotonic()
+        return fn(item)
+
+    def result(index: int, future: Future) -> R:
+        while True:
+            start = started.get(index)
+            wait = 1.0 if timeout is None or start is None else start + timeout - time.monotonic()
+            try:
+                return future.result(timeout=max(min(wait, 1.0), 0))
+            except FutureTimeoutError:
+                if start is not None and timeout is not None and time.monotonic() - start >= timeout:
+                    raise TimeoutError(f"Task {index} exceeded {timeout}s")
+
+    executor = ThreadPoolExecutor(max_workers=max(1, max_workers))
+    pending = deque()
+    try:
+        for index, item in enumerate(items):
+            pending.append(
+                (index, item, executor.submit(contextvars.copy_context().run, run, index, item))
+            )
+            if len(pending) >= max(1, buffer):
+                index, item, future = pending.popleft()
+                yield _resolve(item, lambda: result(index, future), on_error)
+        while pending:
+            index, item, future = pending.popleft()
+            yield _resolve(item, lambda: result(index, future), on_error)
+    finally:
+        # timed out calls can't be interrupted; don't block on them
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _resolve(
+    item: T,
+    result: Callable[[], R],
+    on_error: Optional[Callable[[T, Exception], R]],
+) -> R:
+    try:
+        return result()
+    except Exception as e:
+        if on_error is None:
+            raise
+        return on_error(item, e)
+
+
+def run_in_background(fn: Callable[..., R], *args: Any) -> "Future[R]":
+    """Start fn on its own thread, in a copy of the caller's context."""
+    executor = ThreadPoolExecutor(max_workers=1)
+    future = executor.submit(contextvars.copy_context().run, fn, *args)
+    executor.shutdown(wait=False)
+    return future
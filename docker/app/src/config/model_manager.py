@@ -1,56 +1,512 @@
 import logging
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional, Tuple, Type
+from pydantic import BaseModel
+from botocore.config import Config
 from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, SystemMessage
+from langchain_core.prompts import BasePromptTemplate
 from langchain_aws import ChatBedrockConverse
 from langchain_openai import ChatOpenAI, OpenAIEmbeddings
 from src.config.settings import Settings
+from src.services.cache import CachedEmbeddings, EmbeddingCache, LLMResponseCache
+from src.services.storage import get_storage_provider
+from src.services.tracing import record_llm_call
+from src.services.resilience import (
+    CircuitBreaker,
+    CircuitOpenError,
+    RetryPolicy,
+    RetryStats,
+    is_retryable,
+)
+from src.services.replay import FixtureStore, RecordingEmbeddings, ReplayEmbeddings
+from src.utils import estimate_tokens
 
 logger = logging.getLogger(__name__)
 
+PROVIDER_ALIASES = {"bedrock": "bedrock_anthropic"}
+
+# stage stats of the run active in this context, see ModelManager.track_stages
+_run_stage_stats: ContextVar[Optional[dict]] = ContextVar("run_stage_stats", default=None)
+
+# smallest prompt prefix Bedrock and OpenAI will cache
+MIN_CACHEABLE_TOKENS = 1024
+
 class ModelManager:
+    _instance_lock = threading.Lock()
+
     def __init__(self) -> None:
         self.settings = Settings.get_settings().model
+        self.cache_settings = Settings.get_settings().cache
+        self.fixtures = self.provision_fixtures()
         self.chat = self.provision_chat_model()
+        self.embedding_cache = self.provision_embedding_cache()
         self.embeddings = self.provision_embeddings()
+        self.response_cache = self.provision_response_cache()
+        self._stage_models = {}
+        self._structured_models = {}
+        self.structured_model_builds = Counter()
+        self.stage_stats = {}
+        self.retry_policy = RetryPolicy(
+            self.settings.max_retries,
+            self.settings.retry_base_delay,
+            self.settings.retry_max_delay,
+        )
+        self._breakers = {}
+        self._lock = threading.Lock()
 
     @classmethod
     def get_instance(cls) -> "ModelManager":
         """Get singleton instance of ModelManager."""
         if not hasattr(cls, "_instance"):
-            cls._instance = cls()
+            with cls._instance_lock:
+                if not hasattr(cls, "_instance"):
+                    cls._instance = cls()
         return cls._instance
 
+    def provision_fixtures(self) -> Optional[FixtureStore]:
+        if self.settings.provider_mode == "live":
+            return None
+        logger.info(
+            f" Model provider mode '{self.settings.provider_mode}' with fixtures at {self.settings.fixture_path}"
+        )
+        return FixtureStore(self.settings.fixture_path, self.settings.replay_latency_ms)
+
+    @property
+    def replaying(self) -> bool:
+        return self.settings.provider_mode == "replay"
+
     def provision_chat_model(self) -> BaseChatModel:
+        if self.replaying:
+            self.chat_provider = "replay"
+            self.chat_model_id = "replay"
+            return None
+
         # priority to bedrock
         if self.settings.bedrock_model_id:
-            logger.info(f" Using Bedrock model {self.settings.bedrock_model_id} for chat")
             self.chat_provider = "bedrock_anthropic"
-            return ChatBedrockConverse(model=self.settings.bedrock_model_id)
+            self.chat_model_id = self.settings.bedrock_model_id
         elif self.settings.openai_api_key and self.settings.openai_model_name:
-            logger.info(f" Using OpenAI model {self.settings.openai_model_name} for chat")
+            self.chat_provider = "openai"
+            self.chat_model_id = self.settings.openai_model_name
+        else:
+            raise ValueError(
+                f"No suitable model to provision given model settings"
+            )
+        return self._provision_chat(self.chat_provider, self.chat_model_id)
+
+    def _provision_chat(self, provider: str, model_id: str) -> BaseChatModel:
+        if provider == "bedrock_anthropic":
+            logger.info(f" Using Bedrock model {model_id} for chat")
+            # RetryPolicy is the only retry layer, so disable botocore's own retries
+            return ChatBedrockConverse(
+                model=model_id,
+                config=Config(
+                    retries={"total_max_attempts": 1, "mode": "standard"},
+                    read_timeout=self.settings.request_timeout,
+                ),
+            )
+        elif provider == "openai":
+            logger.info(f" Using OpenAI model {model_id} for chat")
             model = ChatOpenAI(
                 api_key=self.settings.openai_api_key,
-                model=self.settings.openai_model_name,
+                model=model_id,
+                max_retries=0,  # retried by RetryPolicy
+                timeout=self.settings.request_timeout,
             )
-            model = model.bind(
+            return model.bind(
                 strict=True
             )  # enforce strict = true for reliable function calling
-            self.chat_provider = "openai"
-            return model
+        raise ValueError(f"Unknown chat provider '{provider}'")
+
+    def chat_for(self, stage: str) -> Tuple[BaseChatModel, str, str]:
+        """Chat model, provider and model id routed to a pipeline stage.
+
+        Stages without an entry in stage_models use the default chat model.
+        Routed models are provisioned on first use and shared between stages.
+        """
+        spec = self.settings.stage_models.get(stage)
+        if not spec or self.replaying:
+            return self.chat, self.chat_provider, self.chat_model_id
+
+        with self._lock:
+            if spec not in self._stage_models:
+                provider, _, model_id = spec.partition(":")
+                provider = PROVIDER_ALIASES.get(provider, provider)
+                self._stage_models[spec] = (
+                    self._provision_chat(provider, model_id),
+                    provider,
+                    model_id,
+                )
+            return self._stage_models[spec]
+
+    def chat_providers(self) -> set[str]:
+        """Every provider a run may call: the default, routed stages and failover."""
+        if self.replaying:
+            return {self.chat_provider}
+        providers = {self.chat_provider}
+        for spec in self.settings.stage_models.values():
+            provider = spec.partition(":")[0]
+            providers.add(PROVIDER_ALIASES.get(provider, provider))
+        if self.settings.provider_failover:
+            providers |= {"bedrock_anthropic", "openai"}
+        return providers
+
+    def failover_for(self, provider: str) -> Optional[Tuple[BaseChatModel, str, str]]:
+        """Chat model of the other configured provider, if failover is enabled."""
+        if not self.settings.provider_failover or self.replaying:
+            return None
+        if provider == "bedrock_anthropic" and self.settings.openai_api_key and self.settings.openai_model_name:
+            alternate, model_id = "openai", self.settings.openai_model_name
+        elif provider == "openai" and self.settings.bedrock_model_id:
+            alternate, model_id = "bedrock_anthropic", self.settings.bedrock_model_id
         else:
-            raise ValueError(
-                f"No suitable model to provision given model settings"
-            )
+            return None
+
+        spec = f"{alternate}:{model_id}"
+        with self._lock:
+            if spec not in self._stage_models:
+                self._stage_models[spec] = (
+                    self._provision_chat(alternate, model_id),
+                    alternate,
+                    model_id,
+                )
+            return self._stage_models[spec]
+
+    def breaker(self, provider: str) -> CircuitBreaker:
+        with self._lock:
+            if provider not in self._breakers:
+                self._breakers[provider] = CircuitBreaker(
+                    provider,
+                    self.settings.circuit_failure_threshold,
+                    self.settings.circuit_reset_seconds,
+                )
+            return self._breakers[provider]
 
     def provision_embeddings(self):
+        if self.replaying:
+            return ReplayEmbeddings(self.fixtures)
         if (
             self.settings.openai_api_key
             and self.settings.openai_embedding_model_name
         ):
-            return OpenAIEmbeddings(
+            embeddings = OpenAIEmbeddings(
                 model=self.settings.openai_embedding_model_name,
                 api_key=self.settings.openai_api_key,
             )
+            if self.fixtures:
+                embeddings = RecordingEmbeddings(embeddings, self.fixtures)
+            if self.embedding_cache:
+                embeddings = CachedEmbeddings(
+                    embeddings,
+                    self.embedding_cache,
+                    self.settings.openai_embedding_model_name,
+                )
+            return embeddings
         else:
             raise ValueError(
                 f"No suitable embedding model to provision given model settings"
             )
+
+    def provision_response_cache(self) -> Optional[LLMResponseCache]:
+        # replay serves fixtures, and cache hits would never reach the recorder
+        if not self.cache_settings.llm_cache_enabled or self.fixtures:
+            return None
+        cache = LLMResponseCache(
+            self.cache_settings.llm_cache_dir, self.cache_settings.llm_cache_max_mb
+        )
+        if self.cache_settings.llm_cache_s3_path:
+            cache.pull(get_storage_provider(), self.cache_settings.llm_cache_s3_path)
+        logger.info(f" Using LLM response cache at {cache.path}")
+        return cache
+
+    def provision_embedding_cache(self) -> Optional[EmbeddingCache]:
+        # replay serves fixtures, and cache hits would never reach the recorder
+        if not self.cache_settings.embedding_cache_enabled or self.fixtures:
+            return None
+        cache = EmbeddingCache(
+            self.cache_settings.embedding_cache_dir,
+            self.cache_settings.embedding_cache_max_mb,
+        )
+        if self.cache_settings.embedding_cache_s3_path:
+            cache.pull(get_storage_provider(), self.cache_settings.embedding_cache_s3_path)
+        logger.info(f" Using embedding cache at {cache.path}")
+        return cache
+
+    def sync_caches(self) -> None:
+        """Share local caches through the bucket, if configured."""
+        if self.response_cache and self.cache_settings.llm_cache_s3_path:
+            self.response_cache.push(
+                get_storage_provider(), self.cache_settings.llm_cache_s3_path
+            )
+        if self.embedding_cache and self.cache_settings.embedding_cache_s3_path:
+            self.embedding_cache.push(
+                get_storage_provider(), self.cache_settings.embedding_cache_s3_path
+            )
+
+    def cache_stats(self) -> list[str]:
+        return [
+            cache.stats()
+            for cache in (self.response_cache, self.embedding_cache)
+            if cache
+        ]
+
+    def _record_stage(
+        self,
+        stage: str,
+        model_id: str,
+        latency: float,
+        usage: dict,
+        cached_tokens: int = 0,
+        retry_stats: Optional[RetryStats] = None,
+        failed_over: bool = False,
+    ) -> None:
+        run_stage_stats = _run_stage_stats.get()
+        with self._lock:
+            for stage_stats in (self.stage_stats, run_stage_stats):
+                if stage_stats is None:
+                    continue
+                stats = stage_stats.setdefault(
+                    stage,
+                    {
+                        "model": model_id,
+                        "calls": 0,
+                        "latency": 0.0,
+                        "prompt_tokens": 0,
+                        "cached_prompt_tokens": 0,
+                        "completion_tokens": 0,
+                        "retries": 0,
+                        "backoff": 0.0,
+                        "failovers": 0,
+                    },
+                )
+                stats["calls"] += 1
+                stats["latency"] = round(stats["latency"] + latency, 3)
+                stats["prompt_tokens"] += usage.get("input_tokens", 0)
+                stats["cached_prompt_tokens"] += cached_tokens
+                stats["completion_tokens"] += usage.get("output_tokens", 0)
+                if retry_stats:
+                    stats["retries"] += retry_stats.retries
+                    stats["backoff"] = round(stats["backoff"] + retry_stats.backoff, 3)
+                stats["failovers"] += int(failed_over)
+
+    @contextmanager
+    def track_stages(self) -> Iterator[dict]:
+        """Collect the per-stage usage of calls made in this context, e.g. one agent's run.
+
+        Threads started through src.concurrency inherit the context, so their calls
+        are counted too. Process-wide totals stay in stage_stats.
+        """
+        stage_stats = {}
+        token = _run_stage_stats.set(stage_stats)
+        try:
+            yield stage_stats
+        finally:
+            _run_stage_stats.reset(token)
+
+    def stage_report(self, stage_stats: Optional[dict] = None) -> str:
+        stage_stats = self.stage_stats if stage_stats is None else stage_stats
+        return "\n".join(
+            f"{stage}: {stats}" for stage, stats in sorted(stage_stats.items())
+        )
+
+    def _structured(self, chat: BaseChatModel, model_id: str, schema: Type[BaseModel]):
+        """Structured-output runnable for a model and schema, built once and shared."""
+        key = (model_id, schema)
+        structured = self._structured_models.get(key)
+        if structured is None:
+            with self._lock:
+                structured = self._structured_models.get(key)
+                if structured is None:
+                    structured = chat.with_structured_output(schema, include_raw=True)
+                    self._structured_models[key] = structured
+                    self.structured_model_builds[(model_id, schema.__name__)] += 1
+        return structured
+
+    def registry_stats(self) -> str:
+        return ", ".join(
+            f"{model_id}/{schema_name}: {count} build(s)"
+            for (model_id, schema_name), count in self.structured_model_builds.items()
+        )
+
+    @staticmethod
+    def _supports_cache_points(chat: BaseChatModel) -> bool:
+        """Whether the installed botocore accepts cachePoint system blocks.
+
+        Older botocore releases reject them with a ParamValidationError.
+        """
+        client = getattr(getattr(chat, "bound", chat), "client", None)
+        try:
+            shape = client.meta.service_model.shape_for("SystemContentBlock")
+        except Exception:
+            return False
+        return "cachePoint" in shape.members
+
+    @classmethod
+    def _mark_cacheable_prefix(
+        cls, messages: list[BaseMessage], provider: str, chat: BaseChatModel
+    ) -> list[BaseMessage]:
+        """Add provider cache markers after the blocks of a multi-block system prefix.
+
+        OpenAI caches matching prompt prefixes automatically, so only Bedrock
+        needs explicit cache points. Both providers only cache prefixes of at least
+        MIN_CACHEABLE_TOKENS, so shorter prefixes are left unmarked.
+        """
+        if provider != "bedrock_anthropic" or not cls._supports_cache_points(chat):
+            return messages
+        marked = []
+        for message in messages:
+            if isinstance(message, SystemMessage) and isinstance(message.content, list):
+                content, prefix = [], ""
+                for block in message.content:
+                    content.append(block)
+                    prefix += block.get("text", "") if isinstance(block, dict) else block
+                    if estimate_tokens(prefix) >= MIN_CACHEABLE_TOKENS:
+                        content.append({"cachePoint": {"type": "default"}})
+                message = SystemMessage(content=content)
+            marked.append(message)
+        return marked
+
+    @staticmethod
+    def _cached_tokens(raw: AIMessage) -> int:
+        """Prompt tokens served from the provider's prompt cache, if reported."""
+        usage = getattr(raw, "usage_metadata", None) or {}
+        details = usage.get("input_token_details") or {}
+        if details.get("cache_read"):
+            return details["cache_read"]
+        # langchain-aws moves the Converse usage into usage_metadata with snake_case keys
+        if usage.get("cache_read_input_tokens"):
+            return usage["cache_read_input_tokens"]
+        metadata = getattr(raw, "response_metadata", None) or {}
+        openai_details = (metadata.get("token_usage") or {}).get("prompt_tokens_details") or {}
+        return openai_details.get("cached_tokens") or 0
+
+    @staticmethod
+    def _temperature(chat: BaseChatModel) -> Optional[float]:
+        model = getattr(chat, "bound", chat)
+        return getattr(model, "temperature", None)
+
+    def _invoke_resilient(
+        self,
+        schema: Type[BaseModel],
+        messages: list[BaseMessage],
+        target: Tuple[BaseChatModel, str, str],
+        retry_stats: RetryStats,
+    ) -> Tuple[dict, str]:
+        """Invoke with retries, failing over to the alternate provider if enabled.
+
+        Returns the raw structured-output result and the id of the model that answered.
+        """
+        targets = [target]
+        alternate = self.failover_for(target[1])
+        if alternate:
+            targets.append(alternate)
+
+        for index, (chat, provider, model_id) in enumerate(targets):
+            structured_model = self._structured(chat, model_id, schema)
+            marked = self._mark_cacheable_prefix(messages, provider, chat)
+            try:
+                result = self.retry_policy.call(
+                    lambda: structured_model.invoke(marked),
+                    self.breaker(provider),
+                    retry_stats,
+                )
+                return result, model_id
+            except Exception as e:
+                if index == len(targets) - 1 or not (
+                    is_retryable(e) or isinstance(e, CircuitOpenError)
+                ):
+                    raise
+                logger.warning(
+                    f" {provider} failed ({type(e).__name__}), failing over to {targets[index + 1][1]}"
+                )
+
+    def invoke_structured(
+        self,
+        prompt_template: BasePromptTemplate,
+        schema: Type[BaseModel],
+        inputs: dict,
+        stage: str = "default",
+    ) -> BaseModel:
+        """Render the prompt and invoke the stage's chat model for a structured response.
+
+        Responses are served from the response cache when an identical prompt was
+        already answered by the same model for the same schema.
+        """
+        chat, provider, model_id = self.chat_for(stage)
+        prompt_value = prompt_template.invoke(inputs)
+        messages = prompt_value.to_messages()
+
+        cache_key = None
+        if self.response_cache:
+            cache_key = self.response_cache.make_key(
+                model_id,
+                schema.__name__,
+                messages,
+                self._temperature(chat),
+            )
+            cached = self.response_cache.get(cache_key)
+            if cached is not None:
+                logger.info(f" LLM response cache hit for {schema.__name__}")
+                record_llm_call(cache_hit=True)
+                return schema.model_validate_json(cached)
+
+        start_time = time.time()
+        retry_stats = RetryStats()
+        answered_by = model_id
+        if self.replaying:
+            response, usage = self.fixtures.replay_response(schema, messages)
+            latency = time.time() - start_time
+            cached_tokens = 0
+        else:
+            try:
+                result, answered_by = self._invoke_resilient(
+                    schema, messages, (chat, provider, model_id), retry_stats
+                )
+            except Exception:
+                record_llm_call(
+                    retries=retry_stats.retries, backoff=retry_stats.backoff
+                )
+                raise
+            latency = time.time() - start_time
+            if result["parsing_error"]:
+                raise result["parsing_error"]
+            response = result["parsed"]
+
+            usage = getattr(result["raw"], "usage_metadata", None) or {}
+            cached_tokens = self._cached_tokens(result["raw"])
+            if self.fixtures:
+                self.fixtures.record_response(
+                    schema.__name__,
+                    messages,
+                    response,
+                    {
+                        "input_tokens": usage.get("input_tokens", 0),
+                        "output_tokens": usage.get("output_tokens", 0),
+                    },
+                )
+        self._record_stage(
+            stage,
+            model_id,
+            latency,
+            usage,
+            cached_tokens,
+            retry_stats,
+            failed_over=answered_by != model_id,
+        )
+        record_llm_call(
+            prompt_tokens=usage.get("input_tokens", 0),
+            completion_tokens=usage.get("output_tokens", 0),
+            cached_prompt_tokens=cached_tokens,
+            retries=retry_stats.retries,
+            backoff=retry_stats.backoff,
+        )
+
+        # only cache answers from the model the key was made for
+        if cache_key and answered_by == model_id:
+            self.response_cache.set(cache_key, response.model_dump_json())
+        return response
@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import Literal, Optional
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 class BaseAppSettings(BaseSettings):
@@ -12,6 +12,21 @@ class ModelSettings(BaseAppSettings):
     openai_embedding_model_name: Optional[str] = "text-embedding-3-small"
     bedrock_model_id: Optional[str] = None
     embedding_summarize: bool = True
+    # pipeline stage -> "bedrock:<model id>" or "openai:<model name>"
+    stage_models: dict[str, str] = {}
+    prompt_prefix_caching: bool = False
+    provider_mode: Literal["live", "record", "replay"] = "live"
+    fixture_path: str = "./tmp/fixtures/llm_fixtures.jsonl"
+    replay_latency_ms: int = 0
+    max_retries: int = 4
+    retry_base_delay: float = 1.0
+    retry_max_delay: float = 30.0
+    # seconds before the client abandons a stalled model request
+    request_timeout: Optional[float] = 120.0
+    circuit_failure_threshold: int = 5
+    circuit_reset_seconds: float = 60.0
+    # fall back to the other configured provider when the routed one fails
+    provider_failover: bool = False
 
 class StorageSettings(BaseAppSettings):
     """Settings for storage configuration."""
@@ -19,6 +34,61 @@ class StorageSettings(BaseAppSettings):
     db_path: str = "vector_dbs"
     persist_directory: str = f"./tmp/{db_path}/codebase_chroma"
     uningested_path: str = "uningested"
+    storage_provider: Literal["s3", "local"] = "s3"
+    local_storage_root: str = "./local_bucket"
+
+class CacheSettings(BaseAppSettings):
+    """Settings for the persistent LLM response and embedding caches."""
+    llm_cache_enabled: bool = False
+    llm_cache_dir: str = "./tmp/llm_cache"
+    llm_cache_max_mb: int = 256
+    llm_cache_s3_path: Optional[str] = None
+    embedding_cache_enabled: bool = False
+    embedding_cache_dir: str = "./tmp/embedding_cache"
+    embedding_cache_max_mb: int = 512
+    embedding_cache_s3_path: Optional[str] = None
+
+class GenerationSettings(BaseAppSettings):
+    """Settings for the generation pipeline."""
+    subfunction_concurrency: int = 4
+    batch_concurrency: int = 4
+    subfunction_mode: Literal["staged", "fused", "auto"] = "staged"
+    fused_complexity_threshold: int = 40
+    skip_review_when_valid: bool = True
+    combine_mode: Literal["full", "signatures"] = "full"
+    review_output: Literal["full", "patch"] = "full"
+    checkpoint_enabled: bool = False
+    checkpoint_dir: str = "./tmp/checkpoints"
+    checkpoint_s3_path: Optional[str] = "checkpoints"
+    reuse_similarity_threshold: Optional[float] = None
+    reuse_strategy: Literal["return", "refine"] = "return"
+
+class IngestionSettings(BaseAppSettings):
+    """Settings for the ingestion pipeline."""
+    summarize_concurrency: int = 8
+    summarize_timeout: Optional[float] = 120.0
+    # functions packed into one summarization call; 0 summarizes one at a time
+    summarize_batch_tokens: int = 4000
+    summarize_batch_size: int = 10
+    # summarization batches read ahead of the embed/upsert stage
+    pipeline_buffer: int = 16
+    upsert_chunk_size: int = 64
+
+class RetrievalSettings(BaseAppSettings):
+    """Settings for retrieving reusable candidates from the vector store."""
+    retrieval_score_threshold: float = 0.25
+    retrieval_fetch_k: int = 20
+    retrieval_max_k: int = 8
+    retrieval_mmr_lambda: float = 0.7
+    retrieval_duplicate_threshold: float = 0.95
+    retrieval_token_budget: int = 2000
+    # reciprocal rank fusion constant for per-step queries
+    retrieval_rrf_k: int = 60
+
+class TracingSettings(BaseAppSettings):
+    """Settings for per-stage pipeline traces."""
+    trace_dir: Optional[str] = "./tmp/traces"
+    trace_to_dynamodb: bool = False
 
 class LoggingSettings(BaseAppSettings):
     """TODO. Not used"""
@@ -31,6 +101,11 @@ class Settings:
     def __init__(self):
         self.model = ModelSettings()
         self.storage = StorageSettings()
+        self.generation = GenerationSettings()
+        self.cache = CacheSettings()
+        self.retrieval = RetrievalSettings()
+        self.ingestion = IngestionSettings()
+        self.tracing = TracingSettings()
         self.logging = LoggingSettings()
 
     @classmethod
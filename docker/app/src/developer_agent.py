@@ -1,6 +1,10 @@
 import logging
-import ast, astor, black, time
+import ast, astor, black, copy, json, time
 from collections import OrderedDict
+from contextlib import ExitStack
+from concurrent.futures import Future
+from typing import Any, Callable, Optional, Union
+from pydantic import BaseModel
 from langchain_community.callbacks import get_openai_callback
 from langchain_community.callbacks.manager import get_bedrock_anthropic_callback
 from src.prompt_builder import PromptBuilder
@@ -8,61 +12,226 @@ from src.config.settings import Settings
 from src.models.params import GenerationParams
 from src.models.dev_plan import (
     SubfunctionDevPlan,
+    SubfunctionGuidelines,
     StepByStepDevPlan,
 )
-from src.models.code_outputs import CodeOutput, CodeReviewOutput, CombinedOutput
+from src.models.code_outputs import (
+    CodeOutput,
+    CodeReviewOutput,
+    CodeReviewPatchOutput,
+    CombinedOutput,
+    FusedCodeOutput,
+)
 from src.config.model_manager import ModelManager
 from src.chroma_interface import ExperimentVrClient
+from src.concurrency import map_concurrently, run_in_background
+from src.code_validation import validate_code
+from src.code_patch import PatchError, apply_unified_diff
+from src.models.pynamodb_models import GenerationOutputModel, GenerationTraceModel
+from src.services.generation_history import GenerationHistory
+from src.services.tracing import Tracer, set_attributes, span, traced
+from src.services.checkpoint import CheckpointStore
+from src.services.storage import get_storage_provider
+from src.utils import estimate_tokens
+from pynamodb.exceptions import PutError
 
 logger = logging.getLogger(__name__)
 
 
 class DeveloperAgent:
-    def __init__(self) -> None:
+    def __init__(
+        self,
+        generation_params: Optional[GenerationParams] = None,
+        chroma_client: Optional[Union[ExperimentVrClient, "Future[ExperimentVrClient]"]] = None,
+    ) -> None:
         self.settings = Settings.get_settings()
-        self.generation_params = GenerationParams()
+        self.generation_params = generation_params or GenerationParams()
         self.models = ModelManager.get_instance()
         self.prompt_builder = PromptBuilder(self.generation_params)
         self.prompt_template, self.substitution = (
             self.prompt_builder.get_prompt_template()
         )
-        self.experiment_vr_chroma = ExperimentVrClient()
+        # may still be loading; resolved on first use by experiment_vr_chroma
+        self._chroma_client = chroma_client
+        self.generation_history = GenerationHistory(self.models.embeddings)
+        if self.settings.generation.reuse_similarity_threshold is not None:
+            # scan past generations while the prompt is built and planning starts
+            GenerationHistory.prefetch()
         self.history = []
+        self.reuse_metadata = {}
+        self._purpose_embedding = None
+        self.tracer = Tracer(
+            self.generation_params.name, self.generation_params.timestamp
+        )
+        self.checkpoints = self.provision_checkpoints()
+
+    @property
+    def experiment_vr_chroma(self) -> ExperimentVrClient:
+        if isinstance(self._chroma_client, Future):
+            self._chroma_client = self._chroma_client.result()
+        elif self._chroma_client is None:
+            self._chroma_client = ExperimentVrClient()
+        return self._chroma_client
+
+    @property
+    def chroma_pending(self) -> bool:
+        return isinstance(self._chroma_client, Future) and not self._chroma_client.done()
+
+    def provision_checkpoints(self) -> Optional[CheckpointStore]:
+        generation_settings = self.settings.generation
+        if not generation_settings.checkpoint_enabled:
+            return None
+        return CheckpointStore(
+            self.generation_params.name,
+            self.generation_params.timestamp,
+            generation_settings.checkpoint_dir,
+            get_storage_provider()
+            if self.settings.storage.bucket
+            or self.settings.storage.storage_provider == "local"
+            else None,
+            generation_settings.checkpoint_s3_path,
+        )
+
+    def checkpointed(
+        self,
+        stage: str,
+        produce: Callable[[], Any],
+        dump: Callable[[Any], Any] = None,
+        load: Callable[[Any], Any] = None,
+    ) -> Any:
+        """Run produce, or restore its result if an earlier attempt completed this stage."""
+        if self.checkpoints:
+            saved = self.checkpoints.load(stage)
+            if saved is not None:
+                logger.info(f" Restored stage '{stage}' from checkpoint")
+                with span("checkpoint_restore", stage=stage):
+                    return load(saved) if load else saved
+
+        result = produce()
+
+        if self.checkpoints:
+            if dump:
+                data = dump(result)
+            elif isinstance(result, BaseModel):
+                data = result.model_dump(mode="json")
+            else:
+                data = result
+            self.checkpoints.save(stage, data)
+        return result
 
     def generate_with_cb(self):
         callback_map = {
             "openai": get_openai_callback,
             "bedrock_anthropic": get_bedrock_anthropic_callback,
         }
-        
-        callback_function = callback_map.get(self.models.chat_provider)
-        
-        if callback_function:
-            start_time = time.time()
-            with callback_function() as cb:
-                code = self.generate_function()
-                logger.info(cb)
+
+        providers = self.models.chat_providers()
+        unsupported = providers - callback_map.keys()
+        if unsupported and not self.models.replaying:
+            logger.error(
+                f"No suitable callback manager implemented for {sorted(unsupported)}, their usage is not counted"
+            )
+
+        try:
+            with self.tracer.span("generate"), self.models.track_stages() as stage_stats:
+                with ExitStack() as stack:
+                    # one callback per provider, so stages routed to another provider are counted
+                    callbacks = {
+                        provider: stack.enter_context(callback_map[provider]())
+                        for provider in sorted(providers & callback_map.keys())
+                    }
+                    start_time = time.time()
+                    code = self.generate_function()
+                    for provider, cb in callbacks.items():
+                        logger.info(f"{provider} usage:\n{cb}")
+                for cache_stats in self.models.cache_stats():
+                    logger.info(cache_stats)
+                logger.info(f"Per-stage model usage:\n{self.models.stage_report(stage_stats)}")
+                logger.info(f"Structured model builds: {self.models.registry_stats()}")
                 elapsed_time = time.time() - start_time  # Calculate elapsed time
                 logger.info(f"Execution time: {elapsed_time:.2f} seconds")
                 return code
-        else:
-            logger.error(
-                f"No suitable callback manager implemented for '{self.models.chat_provider}', defaulting to no callback"
+        finally:
+            self.write_trace()
+
+    def write_trace(self):
+        tracing_settings = self.settings.tracing
+        logger.info(f"Stage summary:\n{json.dumps(self.tracer.summary(), indent=2)}")
+
+        if tracing_settings.trace_dir:
+            self.tracer.write(tracing_settings.trace_dir)
+
+        if tracing_settings.trace_to_dynamodb:
+            try:
+                GenerationTraceModel(
+                    pk=self.generation_params.name,
+                    sk=f"{self.generation_params.timestamp}#trace",
+                    trace=self.tracer.to_dict(),
+                ).save()
+            except PutError as e:
+                logger.error(f"Error saving trace: {e}")
+
+    @property
+    def purpose_embedding(self) -> list[float]:
+        if self._purpose_embedding is None:
+            self._purpose_embedding = self.generation_history.embed(
+                self.generation_params
             )
-            return self.generate_function()
+        return self._purpose_embedding
+
+    def output_metadata(self) -> dict:
+        """Attributes stored alongside the generated output."""
+        metadata = {
+            "purpose": self.generation_params.purpose,
+            "services": self.generation_params.services,
+            **self.reuse_metadata,
+        }
+        # only needed to find this output again for reuse
+        if self.settings.generation.reuse_similarity_threshold is None:
+            return metadata
+        try:
+            metadata["purpose_embedding"] = self.purpose_embedding
+        except Exception as e:
+            logger.error(f"Could not embed generation guidelines: {e}")
+        return metadata
 
     def generate_function(self):
-        final_plan, reusables = self.reusability_review()
-        generated = []
-
-        for subfunction in final_plan.list_of_subfunctions:
+        reused = self.reuse_past_generation()
+        if reused:
+            return reused
+
+        final_plan, reusables = self.checkpointed(
+            "reusability_review",
+            self.reusability_review,
+            dump=lambda review: {
+                "plan": review[0].model_dump(mode="json"),
+                "reusables": review[1],
+            },
+            load=lambda saved: (
+                SubfunctionDevPlan.model_validate(saved["plan"]),
+                saved["reusables"],
+            ),
+        )
+        self.main_plan = final_plan
+        new_subfunctions = [
+            subfunction
+            for subfunction in final_plan.list_of_subfunctions
+            if not subfunction.reusable
+        ]
 
-            if not subfunction.reusable:
-                sub_prompt_builder = PromptBuilder(subfunction)
-                logger.info(f" Begin subfuction generation for {subfunction.name}")
-                generated.append(self.generate_subfunction(sub_prompt_builder))
+        # subfunctions are planned independently, so they can be generated in
+        # parallel; results keep the plan order for combine_code
+        generated = map_concurrently(
+            self._generate_checkpointed_subfunction,
+            list(enumerate(new_subfunctions)),
+            max_workers=self.settings.generation.subfunction_concurrency,
+        )
 
-        combined_code = self.combine_code(generated, reusables.values())
+        combined_code = self.checkpointed(
+            "combine_code",
+            lambda: self.combine_code(generated, reusables.values()),
+            load=CombinedOutput.model_validate,
+        )
         total_code = generated + [combined_code.function_code]
         cleaned_code = self.post_process_code(total_code)
 
@@ -71,28 +240,160 @@ class DeveloperAgent:
 
         return result
 
-    def reusability_review(self, prompt_builder: PromptBuilder = None, top_k: int = 5):
-        prompt_builder = prompt_builder or self.prompt_builder
-        first_plan = self.generate_dev_plan(map_to_subfunctions=False)
-        first_plan_str = "\n".join(
-            [f"{step.step_number}: {step.purpose}" for step in first_plan.list_of_steps]
+    def reuse_past_generation(self) -> Optional[CombinedOutput]:
+        threshold = self.settings.generation.reuse_similarity_threshold
+        if threshold is None:
+            return None
+
+        with span("reuse_lookup"):
+            match = self.generation_history.find_similar(
+                self.purpose_embedding, threshold
+            )
+        if not match:
+            return None
+
+        previous, score = match
+        strategy = self.settings.generation.reuse_strategy
+        logger.info(
+            f" Reusing past generation {previous.pk} ({previous.sk}) with similarity {score:.3f} via '{strategy}'"
+        )
+        self.reuse_metadata = {
+            "reused_from": f"{previous.pk}#{previous.sk}",
+            "reuse_strategy": strategy,
+            "reuse_similarity": score,
+        }
+
+        if strategy == "refine":
+            return self.refine_previous(previous)
+        return CombinedOutput(
+            function_code=previous.function_code,
+            commentary=previous.commentary or "",
+            sample_usage_python=previous.sample_usage_python or "",
+            sample_usage_chaos_toolkit=previous.sample_usage_chaos_toolkit or "",
         )
-        resuability_candidates_search = self.experiment_vr_chroma.similarity_search(
-            first_plan_str, k=top_k
+
+    @traced("refine_previous")
+    def refine_previous(self, previous: GenerationOutputModel) -> CombinedOutput:
+        prompt = self.prompt_builder.create_refine_previous_prompt(
+            previous.function_code
         )
-        resuability_candidates_formated = [
-            f"###\nFunction Signature: {candidate.metadata['function_signature']}\nFunction Summary: {candidate.page_content}\nImport Path: {candidate.metadata['path']}"
-            for candidate in resuability_candidates_search
-        ]
+        logger.info(f"\n Refine past generation with following prompt:\n{prompt}")
+
+        response = self.models.invoke_structured(
+            self.prompt_template,
+            CombinedOutput,
+            self.substitution(prompt),
+            stage="combine",
+        )
+        self.history.append((prompt, response))
+
+        response.function_code = self.post_process_code([response.function_code])
+        return response
+
+    def retrieve_candidates(
+        self, queries: Union[str, list[str]], top_k: Optional[int] = None
+    ):
+        """Relevant, deduplicated reusable candidates for queries within the token budget.
+
+        Returns the retrieved documents and their prompt formatted form.
+        """
+        retrieval = self.settings.retrieval
+        with span("similarity_search"):
+            results = self.experiment_vr_chroma.relevant_search(
+                queries,
+                score_threshold=retrieval.retrieval_score_threshold,
+                fetch_k=retrieval.retrieval_fetch_k,
+                max_k=top_k or retrieval.retrieval_max_k,
+                mmr_lambda=retrieval.retrieval_mmr_lambda,
+                duplicate_threshold=retrieval.retrieval_duplicate_threshold,
+                rrf_k=retrieval.retrieval_rrf_k,
+            )
+
+            candidates, formatted, tokens = [], [], 0
+            for doc, score in results:
+                candidate = f"###\nFunction Signature: {doc.metadata['function_signature']}\nFunction Summary: {doc.page_content}\nImport Path: {doc.metadata['path']}"
+                candidate_tokens = estimate_tokens(candidate)
+                if formatted and tokens + candidate_tokens > retrieval.retrieval_token_budget:
+                    break
+                tokens += candidate_tokens
+                candidates.append(doc)
+                formatted.append(candidate)
+
+            scores = [round(score, 3) for _, score in results[: len(candidates)]]
+            logger.info(
+                f" Selected {len(candidates)} reusable candidate(s) (~{tokens} tokens) "
+                f"scoring {scores}"
+            )
+            set_attributes(
+                candidates=len(candidates), candidate_tokens=tokens, scores=scores
+            )
+        return candidates, formatted
+
+    def has_reusable_candidates(self) -> bool:
+        """Whether the index holds any functions to review for reuse.
+
+        Relevance is left to the per-step retrieval after the first plan, since a
+        single probe query scores differently from the step queries.
+        """
+        if self.experiment_vr_chroma.is_empty():
+            logger.info(" No reusable candidates indexed, skipping reusability review")
+            return False
+        return True
+
+    def reusability_review(
+        self, prompt_builder: PromptBuilder = None, top_k: Optional[int] = None
+    ):
+        prompt_builder = prompt_builder or self.prompt_builder
+        speculative_plan = None
+        if self.chroma_pending and not (
+            self.checkpoints and self.checkpoints.load("first_plan")
+        ):
+            # the vector DB is still loading, so start the first plan meanwhile
+            speculative_plan = run_in_background(
+                self.generate_dev_plan, False, prompt_builder
+            )
+
+        if not self.has_reusable_candidates():
+            if speculative_plan:
+                logger.info(" Discarding speculative first plan")
+            # nothing to review, so plan straight into subfunctions in one call
+            with span("reusability_review", skipped=True):
+                response = self.generate_dev_plan(
+                    map_to_subfunctions=True, prompt_builder=prompt_builder
+                )
+            self.main_plan = response
+            return response, {}
+
+        first_plan = self.checkpointed(
+            "first_plan",
+            speculative_plan.result
+            if speculative_plan
+            else lambda: self.generate_dev_plan(map_to_subfunctions=False),
+            load=StepByStepDevPlan.model_validate,
+        )
+        # one query per step, so unrelated steps don't blur each other's matches
+        step_purposes = [step.purpose for step in first_plan.list_of_steps]
+        (
+            resuability_candidates_search,
+            resuability_candidates_formated,
+        ) = self.retrieve_candidates(step_purposes, top_k)
+        if not resuability_candidates_search:
+            logger.info(
+                " No candidate scored above the relevance threshold for any plan step"
+            )
         resuability_candidates_str = "\n".join(resuability_candidates_formated)
 
         prompt = prompt_builder.create_subfunction_dev_plan(resuability_candidates_str)
 
         logger.info(f" Reusability review prompt:\n{prompt}")
 
-        reusability_model = self.models.chat.with_structured_output(SubfunctionDevPlan)
-        chain = self.prompt_template | reusability_model
-        response = chain.invoke(self.substitution(prompt))
+        with span("reusability_review"):
+            response = self.models.invoke_structured(
+                self.prompt_template,
+                SubfunctionDevPlan,
+                self.substitution(prompt),
+                stage="reusability",
+            )
         self.history.append((prompt, response))
 
         self.main_plan = response
@@ -114,6 +415,7 @@ class DeveloperAgent:
         logger.info(f"Reusables:\n{reusables}")
         return response, reusables
 
+    @traced("dev_plan")
     def generate_dev_plan(
         self, map_to_subfunctions: bool, prompt_builder: PromptBuilder = None
     ):
@@ -122,18 +424,83 @@ class DeveloperAgent:
         prompt_builder = prompt_builder or self.prompt_builder
         prompt_template, substitution = prompt_builder.get_prompt_template()
 
-        dev_plan_model = self.models.chat.with_structured_output(schema)
-        chain = prompt_template | dev_plan_model
-
         prompt = prompt_builder.create_dev_plan_prompt(map_to_subfunctions)
         logger.info(f"\nGenerate dev plan with following prompt:\n{prompt}")
 
-        response = chain.invoke(substitution(prompt))
+        response = self.models.invoke_structured(
+            prompt_template, schema, substitution(prompt), stage="plan"
+        )
         logger.info(f"\n Response:\n{response}")
         self.history.append((prompt, response))
 
         return response
 
+    def _generate_checkpointed_subfunction(
+        self, indexed_subfunction: tuple[int, SubfunctionGuidelines]
+    ) -> str:
+        index, subfunction = indexed_subfunction
+        return self.checkpointed(
+            f"subfunction_{index}_{subfunction.name}",
+            lambda: self._generate_planned_subfunction(subfunction),
+        )
+
+    def _generate_planned_subfunction(self, subfunction: SubfunctionGuidelines):
+        sub_prompt_builder = PromptBuilder(subfunction)
+        fused = self._use_fused_mode(subfunction)
+        logger.info(
+            f" Begin {'fused' if fused else 'staged'} subfuction generation for {subfunction.name}"
+        )
+        with span(
+            "subfunction",
+            function_name=subfunction.name,
+            mode="fused" if fused else "staged",
+        ):
+            if fused:
+                return self.generate_subfunction_fused(sub_prompt_builder)
+            return self.generate_subfunction(sub_prompt_builder)
+
+    @staticmethod
+    def _subfunction_complexity(subfunction: SubfunctionGuidelines) -> int:
+        """Rough size of a subfunction: words in its purpose, plus 10 per extra service."""
+        return len(subfunction.purpose.split()) + 10 * max(
+            len(subfunction.services) - 1, 0
+        )
+
+    def _use_fused_mode(self, subfunction: SubfunctionGuidelines) -> bool:
+        mode = self.settings.generation.subfunction_mode
+        if mode == "auto":
+            return (
+                self._subfunction_complexity(subfunction)
+                < self.settings.generation.fused_complexity_threshold
+            )
+        return mode == "fused"
+
+    @traced("fused_generation")
+    def generate_subfunction_fused(self, prompt_builder: PromptBuilder):
+        """Plan, write and self-check a subfunction in a single call."""
+        sub_prompt_template, substitution = prompt_builder.get_prompt_template()
+        prompt = prompt_builder.create_fused_generation_prompt()
+
+        logger.info(f"\nGenerating fused plan and code with following prompt:\n{prompt}")
+
+        response = self.models.invoke_structured(
+            sub_prompt_template, FusedCodeOutput, substitution(prompt), stage="codegen"
+        )
+        self.history.append((prompt, response))
+
+        logger.info(f"\n Code generated:\n{response.function_code}\n")
+        logger.info(f"\n Self check:\n{response.self_check}")
+
+        # the separate dev plan and code review calls are replaced, unless
+        # static validation still finds problems worth a review
+        findings = self.validate_generated_code(prompt_builder, response.function_code)
+        if not findings and self.settings.generation.skip_review_when_valid:
+            logger.info(" Static validation passed, skipping code review")
+            set_attributes(saved_llm_calls=2)
+            return response.function_code
+        set_attributes(saved_llm_calls=1)
+        return self.review_code(prompt_builder, response.function_code, findings)
+
     def generate_subfunction(self, prompt_builder: PromptBuilder):
 
         sub_prompt_template, substitution = prompt_builder.get_prompt_template()
@@ -142,44 +509,141 @@ class DeveloperAgent:
         )
 
         code_gen_prompt = prompt_builder.create_code_gen_prompt(dev_plan)
-        code_gen_model = self.models.chat.with_structured_output(CodeOutput)
-        code_gen_chain = sub_prompt_template | code_gen_model
 
         logger.info(f"\nGenerating code with following prompt:\n{code_gen_prompt}")
 
-        code = code_gen_chain.invoke(substitution(code_gen_prompt))
+        with span("code_generation"):
+            code = self.models.invoke_structured(
+                sub_prompt_template,
+                CodeOutput,
+                substitution(code_gen_prompt),
+                stage="codegen",
+            )
         self.history.append((code_gen_prompt, code))
 
         logger.info(f"\n Code generated:\n{code.function_code}\n")
 
+        findings = self.validate_generated_code(prompt_builder, code.function_code)
+        if not findings and self.settings.generation.skip_review_when_valid:
+            logger.info(" Static validation passed, skipping code review")
+            return code.function_code
+
+        return self.review_code(prompt_builder, code.function_code, findings)
+
+    @traced("static_validation")
+    def validate_generated_code(
+        self, prompt_builder: PromptBuilder, function_code: str
+    ) -> list[str]:
+        findings = validate_code(
+            function_code,
+            getattr(prompt_builder.guideline_parameters, "function_signature", None),
+        )
+        set_attributes(findings=findings)
+        if findings:
+            logger.info(" Static validation findings:\n" + "\n".join(findings))
+        return findings
+
+    def review_code(
+        self, prompt_builder: PromptBuilder, function_code: str, findings: list[str]
+    ) -> str:
+        if self.settings.generation.review_output == "patch":
+            return self.review_code_patch(prompt_builder, function_code, findings)
+        return self.review_code_full(prompt_builder, function_code, findings)
+
+    def review_code_patch(
+        self, prompt_builder: PromptBuilder, function_code: str, findings: list[str]
+    ) -> str:
+        """Review asking for a unified diff, falling back to a full revision if it does not apply."""
+        sub_prompt_template, substitution = prompt_builder.get_prompt_template()
+        code_review_prompt = prompt_builder.create_code_review_prompt(
+            function_code, findings, as_patch=True
+        )
+
+        logger.info(
+            f"\n Starting patch code review with following prompt:\n{code_review_prompt}"
+        )
+
+        with span("code_review", output="patch"):
+            result = self.models.invoke_structured(
+                sub_prompt_template,
+                CodeReviewPatchOutput,
+                substitution(code_review_prompt),
+                stage="review",
+            )
+            self.history.append((code_review_prompt, result))
+            logger.info(f" Needs revision? {result.needs_revision}\n{result.patch}")
+
+            if not result.needs_revision:
+                return function_code
+
+            try:
+                revised_code = apply_unified_diff(function_code, result.patch or "")
+                ast.parse(revised_code)
+                set_attributes(patch_applied=True)
+                return revised_code
+            except (PatchError, SyntaxError) as e:
+                logger.info(f" Review patch could not be applied: {e}")
+                set_attributes(patch_applied=False)
+
+        logger.info(" Falling back to full code revision")
+        return self.review_code_full(prompt_builder, function_code, findings)
+
+    def review_code_full(
+        self, prompt_builder: PromptBuilder, function_code: str, findings: list[str]
+    ) -> str:
+        sub_prompt_template, substitution = prompt_builder.get_prompt_template()
         code_review_prompt = prompt_builder.create_code_review_prompt(
-            code.function_code
+            function_code, findings
         )
-        code_review_model = self.models.chat.with_structured_output(CodeReviewOutput)
-        code_review_chain = sub_prompt_template | code_review_model
 
         logger.info(
-            f"\n Starting code review with following prompt:\n{code_gen_prompt}"
+            f"\n Starting code review with following prompt:\n{code_review_prompt}"
         )
 
-        result = code_review_chain.invoke(substitution(code_review_prompt))
+        with span("code_review"):
+            result = self.models.invoke_structured(
+                sub_prompt_template,
+                CodeReviewOutput,
+                substitution(code_review_prompt),
+                stage="review",
+            )
         self.history.append((code_review_prompt, result))
         logger.info(f" Needs revision? {result.needs_revision}\n{result.revised_code}")
 
-        return result.revised_code if result.needs_revision else code.function_code
+        return result.revised_code if result.needs_revision else function_code
 
+    @traced("combine_code")
     def combine_code(self, generated: list[str], reusables: list[str]):
+        signatures_only = self.settings.generation.combine_mode == "signatures"
+        if signatures_only:
+            # subfunction bodies are spliced back in by post_process_code, so the
+            # model only needs their interfaces to write the main function
+            generated_for_prompt = [self.signature_stubs(code) for code in generated]
+        else:
+            generated_for_prompt = generated
+
         prompt = self.prompt_builder.create_combine_code_prompt(
-            generated, reusables, self.main_plan.combination_notes
+            generated_for_prompt,
+            reusables,
+            self.main_plan.combination_notes,
+            signatures_only=signatures_only,
         )
-        combine_code_model = self.models.chat.with_structured_output(CombinedOutput)
-        chain = self.prompt_template | combine_code_model
 
         logger.info(f"\n Combine code with following prompt:\n{prompt}")
 
-        response = chain.invoke(self.substitution(prompt))
+        response = self.models.invoke_structured(
+            self.prompt_template,
+            CombinedOutput,
+            self.substitution(prompt),
+            stage="combine",
+        )
         self.history.append((prompt, response))
 
+        if signatures_only:
+            response.function_code = self.drop_redefinitions(
+                response.function_code, generated
+            )
+
         logger.info(f"\n Combined Code:\n{response.function_code}")
         logger.info(f"\n Commentary:\n{response.commentary}")
         logger.info(f"\n Sample Usage Python:\n{response.sample_usage_python}")
@@ -187,6 +651,53 @@ class DeveloperAgent:
 
         return response
 
+    @staticmethod
+    def signature_stubs(code: str) -> str:
+        """Reduce code to its top level function signatures and docstrings."""
+        try:
+            tree = ast.parse(code)
+        except SyntaxError:
+            return code
+
+        stubs = []
+        for node in tree.body:
+            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                stub = copy.deepcopy(node)
+                docstring = ast.get_docstring(node)
+                stub.body = ([node.body[0]] if docstring else []) + [
+                    ast.Expr(value=ast.Constant(value=Ellipsis))
+                ]
+                stubs.append(stub)
+        return astor.to_source(ast.Module(body=stubs, type_ignores=[])) if stubs else code
+
+    @staticmethod
+    def drop_redefinitions(code: str, generated: list[str]) -> str:
+        """Remove functions from code that are already defined in generated."""
+        try:
+            tree = ast.parse(code)
+            generated_names = {
+                node.name
+                for generated_code in generated
+                for node in ast.parse(generated_code).body
+                if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef))
+            }
+        except SyntaxError:
+            return code
+
+        body = [
+            node
+            for node in tree.body
+            if not (
+                isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef))
+                and node.name in generated_names
+            )
+        ]
+        if len(body) == len(tree.body):
+            return code
+        logger.info(" Dropped subfunctions redefined by the combine step")
+        return astor.to_source(ast.Module(body=body, type_ignores=[]))
+
+    @traced("post_process")
     def post_process_code(self, code_sequence: list[str]) -> str:
         try:
             merged_imports = OrderedDict()
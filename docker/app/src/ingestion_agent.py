@@ -1,11 +1,13 @@
 import logging
+from itertools import islice
 from pathlib import Path
 from typing import List, Optional
 
 from src.config.model_manager import ModelManager
 from src.preprocessors import PythonPreprocessor
 from src.chroma_interface import ExperimentVrClient
-from src.services.storage import S3StorageProvider
+from src.services.storage import get_storage_provider
+from src.services.ingestion_manifest import IngestionManifest
 from src.config.settings import Settings
 
 logger = logging.getLogger(__name__)
@@ -15,20 +17,34 @@ class IngestionAgent:
     
     def __init__(self) -> None:
         self.settings = Settings.get_settings()
-        self.models = ModelManager.get_instance()
-        self.storage = S3StorageProvider()
+        self.storage = get_storage_provider()
         self.preprocessor = PythonPreprocessor()
         self.chroma_client: Optional[ExperimentVrClient] = None
         self.tmp_path = Path("./tmp")
 
+    @property
+    def models(self) -> ModelManager:
+        # resolved on use, so the vector DB download need not wait for provisioning
+        return ModelManager.get_instance()
+
     def ingest(self) -> None:
         """Ingest files from storage into ChromaDB."""
         try:
             logger.info("Starting ingestion process...")
             self._initialize_chroma_db()
             uningested_files = self._download_uningested_files()
-            self._process_and_embed_files(uningested_files)
-            self._finalize_ingestion()
+            failed = self._process_and_embed_files(uningested_files)
+            # keep the uploaded sources while any function still needs ingesting
+            self._finalize_ingestion(delete_uningested=not failed)
+            if failed:
+                raise RuntimeError(
+                    f"Failed to summarize {len(failed)} function(s), "
+                    f"left {self.settings.storage.uningested_path} in place for retry: {failed}"
+                )
+            for cache_stats in self.models.cache_stats():
+                logger.info(cache_stats)
+            logger.info(f"Per-stage model usage:\n{self.models.stage_report()}")
+            logger.info(f"Structured model builds: {self.models.registry_stats()}")
             logger.info("Ingestion process completed successfully")
         except Exception as e:
             logger.error(f"Ingestion process failed: {str(e)}")
@@ -54,50 +70,69 @@ class IngestionAgent:
             logger.error(f"Failed to download uningested files: {str(e)}")
             raise
 
-    def _process_and_embed_files(self, uningested_path: Path) -> None:
-        """Process and embed files into ChromaDB."""
+    def _process_and_embed_files(self, uningested_path: Path) -> List[str]:
+        """Process and embed files into ChromaDB, returning the functions that failed."""
         if not self.chroma_client:
             raise RuntimeError("ChromaDB client not initialized")
 
         python_files = self._get_python_files(uningested_path)
         if not python_files:
             logger.info("No Python files found for processing")
-            return
+            return []
 
+        manifest = IngestionManifest(
+            self.tmp_path / self.settings.storage.db_path / "ingestion_manifest.json"
+        )
         try:
-            results_to_embed = self.preprocessor.process_list_of_files(
+            # parse -> summarize -> embed/upsert, pulled chunk by chunk so summaries
+            # keep running while each chunk is embedded
+            documents = self.preprocessor.stream_documents(
                 python_files,
-                summarize=self.settings.model.embedding_summarize
+                summarize=self.settings.model.embedding_summarize,
+                manifest=manifest,
+            )
+            chunk_size = self.settings.ingestion.upsert_chunk_size
+            upserted = 0
+            while chunk := list(islice(documents, chunk_size)):
+                logger.info(f"Embedding {len(chunk)} document(s) into local Chroma DB...")
+                self.chroma_client.upsert_docs_with_id(docs=chunk)
+                upserted += len(chunk)
+
+            logger.info(
+                f"Upserted {upserted} document(s), skipped {manifest.skipped} unchanged function(s)"
             )
-            
-            if results_to_embed:
-                logger.info(f"Embedding {len(results_to_embed)} document(s) into local Chroma DB...")
-                self.chroma_client.upsert_docs_with_id(docs=results_to_embed)
+            manifest.commit()
+            return manifest.failed
         except Exception as e:
             logger.error(f"Failed to process or embed files: {str(e)}")
             raise
 
-    def _finalize_ingestion(self) -> None:
+    def _finalize_ingestion(self, delete_uningested: bool = True) -> None:
         """Upload processed files and clean up."""
         try:
             self.storage.upload_directory(
                 self.tmp_path / self.settings.storage.db_path,
                 self.settings.storage.db_path
             )
-            self.storage.delete_directory(self.settings.storage.uningested_path)
+            if delete_uningested:
+                self.storage.delete_directory(self.settings.storage.uningested_path)
         except Exception as e:
             logger.error(f"Failed to finalize ingestion: {str(e)}")
             raise
 
+    def download_chroma_db(self) -> None:
+        """Download the current ChromaDB data."""
+        db_path = self.settings.storage.db_path
+        self.storage.download_directory(
+            db_path,
+            f"./tmp/{db_path}"
+        )
+
     def get_current_chroma_db(self) -> ExperimentVrClient:
         """Get or create ChromaDB client with current data."""
         try:
-            db_path = self.settings.storage.db_path
-            self.storage.download_directory(
-                db_path,
-                f"./tmp/{db_path}"
-            )
-            return ExperimentVrClient(embedding_function=self.models.provision_embeddings())
+            self.download_chroma_db()
+            return ExperimentVrClient(embedding_function=self.models.embeddings)
         except Exception as e:
             logger.error(f"Failed to initialize ChromaDB: {str(e)}")
             raise
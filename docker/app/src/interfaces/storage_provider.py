@@ -15,6 +15,11 @@ class StorageProvider(ABC):
         """Upload a directory to storage."""
         pass
     
+    @abstractmethod
+    def upload_file(self, source: Path, destination: str) -> None:
+        """Upload a single file to storage."""
+        pass
+    
     @abstractmethod
     def delete_directory(self, path: str) -> None:
         """Delete a directory from storage."""
@@ -1,5 +1,6 @@
 from pydantic import BaseModel, Field
 from typing import Optional
+from src.models.dev_plan import Step
 
 class CodeOutput(BaseModel):
     """Structure for code generation outputs"""
@@ -28,3 +29,26 @@ class CodeReviewOutput(BaseModel):
     revised_code: Optional[str] = Field(
         description="Revised code, if code needs revision. Populate only if needs_revision is True."
     )
+
+
+class CodeReviewPatchOutput(BaseModel):
+    """Structure for code review outputs returning a patch"""
+
+    needs_revision: bool = Field(
+        description="True if the function needs revision, else False"
+    )
+    patch: Optional[str] = Field(
+        description="Unified diff against the reviewed code that applies the revision, with a few unchanged context lines around each change. Populate only if needs_revision is True."
+    )
+
+
+class FusedCodeOutput(BaseModel):
+    """Structure for a plan, code and self-check returned in a single response"""
+
+    list_of_steps: list[Step] = Field(
+        description="Short step by step plan followed to implement the function"
+    )
+    function_code: str = Field(description="Full function code as a string")
+    self_check: str = Field(
+        description="Brief check of the code against the guidelines and plan, noting any fixes already applied to the code"
+    )
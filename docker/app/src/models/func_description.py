@@ -8,3 +8,19 @@ class FunctionDescription(BaseModel):
         "Function signature with relevant type hints and defaults if available."
     )
     summary: str = Field("Summary of what the function does and its purpose.")
+
+
+class KeyedFunctionDescription(FunctionDescription):
+    """Description of one function in a batch, keyed by its path"""
+
+    function_path: str = Field(
+        description="Path of the described function, exactly as given in the input."
+    )
+
+
+class FunctionDescriptionBatch(BaseModel):
+    """Descriptions for every function in a batch"""
+
+    descriptions: list[KeyedFunctionDescription] = Field(
+        description="One description for each function provided."
+    )
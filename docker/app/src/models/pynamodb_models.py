@@ -1,6 +1,11 @@
 import os
 from pynamodb.models import Model
-from pynamodb.attributes import UnicodeAttribute
+from pynamodb.attributes import (
+    JSONAttribute,
+    ListAttribute,
+    NumberAttribute,
+    UnicodeAttribute,
+)
 
 
 class GenerationOutputModel(Model):
@@ -18,3 +23,23 @@ class GenerationOutputModel(Model):
     commentary = UnicodeAttribute(null=True)
     sample_usage_python = UnicodeAttribute(null=True)
     sample_usage_chaos_toolkit = UnicodeAttribute(null=True)
+
+    purpose = UnicodeAttribute(null=True)
+    services = ListAttribute(of=UnicodeAttribute, null=True)
+    purpose_embedding = ListAttribute(of=NumberAttribute, null=True)
+    reused_from = UnicodeAttribute(null=True)
+    reuse_strategy = UnicodeAttribute(null=True)
+    reuse_similarity = NumberAttribute(null=True)
+
+
+class GenerationTraceModel(Model):
+    """Per-stage trace of a generation, stored next to its output."""
+
+    class Meta:
+        table_name = os.getenv("TABLE_NAME", "ap-developer")
+        region = os.getenv("REGION", "us-east-1")
+
+    pk = UnicodeAttribute(hash_key=True)
+    sk = UnicodeAttribute(range_key=True)
+
+    trace = JSONAttribute()
@@ -1,13 +1,18 @@
 import ast, os, json
 import logging
-from typing import List, Dict, Any
+from functools import lru_cache
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Tuple
 
 from langchain_core.documents import Document
 from langchain.prompts import PromptTemplate
 
 from src.interfaces.file_preprocessor import FilePreprocessor
-from src.models.func_description import FunctionDescription
+from src.models.func_description import FunctionDescription, FunctionDescriptionBatch
 from src.config.model_manager import ModelManager
+from src.config.settings import Settings
+from src.concurrency import map_concurrently, stream_concurrently
+from src.services.ingestion_manifest import IngestionManifest
+from src.utils import estimate_tokens
 
 logger = logging.getLogger(__name__)
 
@@ -18,22 +23,156 @@ class CodePreprocessor(FilePreprocessor):
         """Generate a summary of the content using the model."""
         logger.info(f"Summarizing {file_type} content...")
         
-        model = ModelManager.get_instance().chat.with_structured_output(FunctionDescription)
-        chain = self._create_summarize_prompt() | model
-        
-        response = chain.invoke({
-            "lang": file_type,
-            "func_json": json.dumps(content)
-        })
+        response = ModelManager.get_instance().invoke_structured(
+            self._create_summarize_prompt(),
+            FunctionDescription,
+            {"lang": file_type, "func_json": json.dumps(content)},
+            stage="summarize",
+        )
         
         logger.info(f"Generated summary: {response}")
         return Document(
             page_content=response.summary,
             metadata={"path": path, "function_signature": response.function_signature}
         )
-    
-    def _create_summarize_prompt(self):
-        """Get the prompt template for summarization."""
+
+    def summarize_stream(
+        self,
+        functions: Iterable[Tuple[str, str]],
+        file_type: str,
+        manifest: Optional[IngestionManifest] = None,
+    ) -> Iterator[Document]:
+        """Lazily summarize (path, source) pairs concurrently, yielding documents in order.
+
+        Small functions are packed into batched calls when summarize_batch_tokens is
+        set. Only pipeline_buffer batches are read ahead of the consumer.
+        """
+        settings = Settings.get_settings().ingestion
+        if settings.summarize_batch_tokens > 0:
+            batches = self._batch(
+                functions, settings.summarize_batch_tokens, settings.summarize_batch_size
+            )
+        else:
+            batches = ({path: content} for path, content in functions)
+
+        def failed(func_path: str, error: Exception) -> None:
+            # the manifest keeps failures for the caller to act on
+            if manifest is None:
+                raise error
+            logger.error(f"Failed to summarize {func_path}: {error!r}")
+            manifest.discard(func_path)
+
+        def on_function_error(function: Tuple[str, str], error: Exception) -> None:
+            failed(function[0], error)
+
+        def on_batch_error(batch: Dict[str, str], error: Exception) -> tuple:
+            if len(batch) == 1:
+                failed(next(iter(batch)), error)
+            else:
+                logger.warning(
+                    f"Batched summarization of {len(batch)} functions failed, falling back to single calls: {error!r}"
+                )
+            return batch, {}
+
+        for batch, summaries in stream_concurrently(
+            lambda batch: (batch, self.summarize_batch(batch, file_type)),
+            batches,
+            max_workers=settings.summarize_concurrency,
+            buffer=settings.pipeline_buffer,
+            timeout=settings.summarize_timeout,
+            on_error=on_batch_error,
+        ):
+            missing = [
+                (path, content)
+                for path, content in batch.items()
+                if path not in summaries and len(batch) > 1
+            ]
+            if missing:
+                # each fallback is its own task with its own timeout
+                logger.info(f"Summarizing {len(missing)} function(s) missing from the batch response")
+                fallbacks = map_concurrently(
+                    lambda function: self.summarize(
+                        function[1], file_type=file_type, path=function[0]
+                    ),
+                    missing,
+                    max_workers=settings.summarize_concurrency,
+                    timeout=settings.summarize_timeout,
+                    on_error=on_function_error,
+                )
+                summaries.update(
+                    (path, summary)
+                    for (path, _), summary in zip(missing, fallbacks)
+                    if summary is not None
+                )
+            yield from (summaries[path] for path in batch if path in summaries)
+
+    def summarize_batch(
+        self, functions: Dict[str, str], file_type: str
+    ) -> Dict[str, Document]:
+        """Summarize several functions in one call, keyed by function path.
+
+        Only functions the response describes are returned; the caller summarizes
+        any others individually.
+        """
+        if len(functions) == 1:
+            (path, content), = functions.items()
+            return {path: self.summarize(content, file_type=file_type, path=path)}
+
+        logger.info(f"Summarizing {len(functions)} {file_type} functions in one call...")
+        response = ModelManager.get_instance().invoke_structured(
+            self._create_batch_summarize_prompt(),
+            FunctionDescriptionBatch,
+            {"lang": file_type, "funcs_json": json.dumps(functions, indent=2)},
+            stage="summarize",
+        )
+        return {
+            description.function_path: Document(
+                page_content=description.summary,
+                metadata={
+                    "path": description.function_path,
+                    "function_signature": description.function_signature,
+                },
+            )
+            for description in response.descriptions
+            if description.function_path in functions
+        }
+
+    @staticmethod
+    def _batch(
+        functions: Iterable[Tuple[str, str]], max_tokens: int, max_size: int
+    ) -> Iterator[Dict[str, str]]:
+        """Pack (path, source) pairs in order into batches within a rough token budget."""
+        batch, tokens = {}, 0
+        for path, content in functions:
+            content_tokens = estimate_tokens(content)
+            if batch and (tokens + content_tokens > max_tokens or len(batch) >= max_size):
+                yield batch
+                batch, tokens = {}, 0
+            batch[path] = content
+            tokens += content_tokens
+        if batch:
+            yield batch
+
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def _create_batch_summarize_prompt():
+        """Get the prompt template for batched summarization, built once per process."""
+        template = """
+        Your task is to provide a short concise summary of each {lang} function provided along with the name of the function and a list of arguments.
+        The functions are given as a JSON object mapping each function's path to its source. Return exactly one description per function, with function_path set to its path.
+
+        Functions
+        {funcs_json}
+        """
+        return PromptTemplate(
+            template=template,
+            input_variables=["lang", "funcs_json"]
+        )
+
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def _create_summarize_prompt():
+        """Get the prompt template for summarization, built once per process."""
         template = """
         Your task is to provide a short concise summary of the {lang} function provided along with the name of the function and a list of arguments.
 
@@ -48,20 +187,64 @@ class CodePreprocessor(FilePreprocessor):
 class PythonPreprocessor(CodePreprocessor):
     """Preprocessor for Python files."""
     
-    def process_file(self, file_path: str, summarize: bool, **kwargs):
+    def process_file(
+        self,
+        file_path: str,
+        summarize: bool,
+        manifest: Optional[IngestionManifest] = None,
+        **kwargs,
+    ):
+        return list(self.stream_documents([file_path], summarize, manifest))
+
+    def process_list_of_files(
+        self,
+        list_of_paths: list[str],
+        summarize: bool,
+        manifest: Optional[IngestionManifest] = None,
+        **kwargs,
+    ):
+        """Process all files together, so summaries run concurrently across files."""
+        return list(self.stream_documents(list_of_paths, summarize, manifest))
+
+    def stream_documents(
+        self,
+        list_of_paths: Iterable[str],
+        summarize: bool,
+        manifest: Optional[IngestionManifest] = None,
+    ) -> Iterator[Document]:
+        """Lazily parse files and yield their function documents in order.
+
+        Files are only parsed as the consumer pulls documents, so memory stays
+        bounded by the summarization buffer rather than the size of the codebase.
+        """
+        logger.info(f"Summarize: {summarize}")
+        functions = (
+            function
+            for file_path in list_of_paths
+            for function in self._functions_to_process(file_path, summarize, manifest).items()
+        )
+        if summarize == True:
+            yield from self.summarize_stream(functions, "python", manifest)
+            return
+        for func_path, code_str in functions:
+            yield Document(page_content=code_str, metadata={"path": func_path})
+
+    def _functions_to_process(
+        self,
+        file_path: str,
+        summarize: bool,
+        manifest: Optional[IngestionManifest] = None,
+    ) -> Dict[str, str]:
         logger.info(f"Processing file: {file_path}")
         functions = self.split_file_by_functions(file_path)
-        logger.info(f"Summarize: {summarize}")
 
-        if summarize == True:
-            return [
-                self.summarize(code_str, file_type="python", path=func_path)
+        if manifest:
+            functions = {
+                func_path: code_str
                 for func_path, code_str in functions.items()
-            ]
-        return [
-            Document(page_content=code_str, metadata={"path": func_path})
-            for func_path, code_str in functions.items()
-        ]
+                if manifest.changed(func_path, code_str, summarize)
+            }
+        return functions
 
     def split_file_by_functions(
         self, file_path: str, remove_prefix: str = "tmp.uningested."
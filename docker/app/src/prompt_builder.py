@@ -1,11 +1,14 @@
 import logging
+from functools import lru_cache
 from typing import Union
 import yaml
 from pathlib import Path
-from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.messages import SystemMessage
+from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langchain.prompts import PromptTemplate
 from src.models.params import GenerationParams
 from src.models.dev_plan import SubfunctionGuidelines, StepByStepDevPlan
+from src.config.settings import Settings
 
 logger = logging.getLogger(__name__)
 
@@ -17,11 +20,14 @@ class PromptBuilder:
         self.function_name = guideline_parameters.name
         self.guidelines = self.__generate_guidelines()
         self.prompts = self._load_prompts()
+        self.prefix_caching = Settings.get_settings().model.prompt_prefix_caching
+        self.shared_context = None
         logger.info(
             f" Instantiated Prompt Builder with the following guidelines:\n{self.guidelines}"
         )
 
     @staticmethod
+    @lru_cache(maxsize=None)
     def _load_prompts():
         """Load prompts from YAML file with caching."""
         prompt_path = Path(__file__).parent / "config" / "prompts.yaml"
@@ -40,14 +46,52 @@ class PromptBuilder:
         return PromptBuilder.dict_to_str_fmt(gl)
 
     def get_prompt_template(self, query_var: str = "query"):
+        if self.prefix_caching:
+            return self._get_prefix_prompt_template(query_var)
+
         system_template = self.prompts["system"]["developer_role"]
         def substitute(prompt: str):
             return {query_var: prompt}
 
-        template = ChatPromptTemplate.from_messages(
+        template = PromptBuilder._chat_prompt_template(system_template, query_var)
+        return template, substitute
+
+    def _get_prefix_prompt_template(self, query_var: str):
+        """Template whose system message is a stable, cacheable prefix.
+
+        The prefix holds the developer role and guidelines, then any shared context
+        such as retrieved candidates, as separate text blocks so providers can cache
+        each one. Stage prompts then only carry the stage specific request.
+        """
+        def substitute(prompt: str):
+            blocks = [
+                f"{self.prompts['system']['developer_role']}\n"
+                f"{self.prompts['system']['guidelines_header']}\n{self.guidelines}"
+            ]
+            if self.shared_context:
+                blocks.append(self.shared_context)
+            prefix = SystemMessage(
+                content=[{"type": "text", "text": block} for block in blocks]
+            )
+            return {"prefix": [prefix], query_var: prompt}
+
+        template = PromptBuilder._prefix_prompt_template(query_var)
+        return template, substitute
+
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def _prefix_prompt_template(query_var: str):
+        return ChatPromptTemplate.from_messages(
+            [MessagesPlaceholder("prefix"), ("user", f"{{{query_var}}}")]
+        )
+
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def _chat_prompt_template(system_template: str, query_var: str):
+        """Build each distinct chat template once so model chains can be reused."""
+        return ChatPromptTemplate.from_messages(
             [("system", system_template), ("user", f"{{{query_var}}}")]
         )
-        return template, substitute
 
     def create_prompt(self, template_key: str, **kwargs) -> str:
         """
@@ -65,8 +109,14 @@ class PromptBuilder:
         for key in template_key.split('.'):
             template = template[key]
             
-        # Always include guidelines in the formatting parameters
-        format_params = {'guidelines': self.guidelines}
+        # Always include guidelines in the formatting parameters; with prefix
+        # caching they are already in the system message
+        guidelines = (
+            self.prompts['system']['guidelines_reference']
+            if self.prefix_caching
+            else self.guidelines
+        )
+        format_params = {'guidelines': guidelines}
         format_params.update(kwargs)
         
         return template.format(**format_params)
@@ -82,6 +132,12 @@ class PromptBuilder:
         return prompt
 
     def create_subfunction_dev_plan(self, reusable_candidates: str) -> str:
+        if self.prefix_caching:
+            # candidates join the cacheable prefix for this and later prompts
+            self.shared_context = (
+                f"{self.prompts['system']['candidates_header']}\n{reusable_candidates}"
+            )
+            reusable_candidates = self.prompts['system']['candidates_reference']
         return self.create_prompt(
             'development.subfunction_dev_plan',
             reusable_candidates=reusable_candidates
@@ -97,15 +153,36 @@ class PromptBuilder:
             steps_str=steps_str
         )
 
-    def create_code_review_prompt(self, code: str) -> str:
+    def create_fused_generation_prompt(self) -> str:
+        return self.create_prompt('development.fused_generation')
+
+    def create_code_review_prompt(
+        self, code: str, findings: list[str] = None, as_patch: bool = False
+    ) -> str:
+        findings_str = ""
+        if findings:
+            findings_str = (
+                "Static analysis reported the following problems, which must be fixed:\n"
+                + "\n".join(f"- {finding}" for finding in findings)
+            )
         return self.create_prompt(
-            'review.code_review',
-            code=code
+            'review.code_review_patch' if as_patch else 'review.code_review',
+            code=code,
+            findings=findings_str
         )
 
     def create_combine_code_prompt(
-        self, generated: list[str], reusable: list[str], combination_notes: str
+        self,
+        generated: list[str],
+        reusable: list[str],
+        combination_notes: str,
+        signatures_only: bool = False,
     ) -> str:
+        template_key = (
+            'combination.combine_signatures'
+            if signatures_only
+            else 'combination.combine_code'
+        )
         generated = "\n".join(generated)
         reusable_str = ""
         if reusable:
@@ -114,12 +191,18 @@ class PromptBuilder:
                 + "\n\n".join(reusable)
             )
         return self.create_prompt(
-            'combination.combine_code',
+            template_key,
             generated=generated,
             reusable=reusable_str,
             combination_notes=combination_notes
         )
 
+    def create_refine_previous_prompt(self, previous_code: str) -> str:
+        return self.create_prompt(
+            'combination.refine_previous',
+            previous_code=previous_code
+        )
+
     def create_resuability_review_prompt(self, candidates: list[str]):
         formated_candidates = "\n".join(candidates)
         return self.prompts["review"]["reusability_review"].format(
@@ -0,0 +1,184 @@
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from array import array
+from pathlib import Path
+from typing import Any, Optional
+
+from langchain_core.embeddings import Embeddings
+
+from src.interfaces.storage_provider import StorageProvider
+
+logger = logging.getLogger(__name__)
+
+
+def content_hash(*parts: Any) -> str:
+    """Content-address the given parts into a stable hex digest."""
+    payload = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def render_messages(messages: list) -> list:
+    """Provider independent form of chat messages, used in cache keys."""
+    return [(message.type, message.content) for message in messages]
+
+
+class SQLiteLRUCache:
+    """Size-bounded key/value store on SQLite with least-recently-used eviction."""
+
+    def __init__(self, directory: str, filename: str, max_mb: int) -> None:
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.path = self.directory / filename
+        self.max_bytes = max_mb * 1024 * 1024
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            "key TEXT PRIMARY KEY, value BLOB NOT NULL, "
+            "size INTEGER NOT NULL, last_access REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS entries_last_access ON entries (last_access)"
+        )
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._conn.execute(
+                "UPDATE entries SET last_access = ? WHERE key = ?", (time.time(), key)
+            )
+            self._conn.commit()
+            return row[0]
+
+    def set(self, key: str, value: Any) -> None:
+        size = len(value)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (key, value, size, last_access) "
+                "VALUES (?, ?, ?, ?)",
+                (key, value, size, time.time()),
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self) -> None:
+        """Drop least recently used entries until the store fits max_bytes."""
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        evicted = 0
+        for key, size in self._conn.execute(
+            "SELECT key, size FROM entries ORDER BY last_access ASC"
+        ).fetchall():
+            if total <= self.max_bytes:
+                break
+            self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            total -= size
+            evicted += 1
+        logger.info(f" Evicted {evicted} entries from {self.path.name}")
+
+    def stats(self) -> str:
+        lookups = self.hits + self.misses
+        ratio = self.hits / lookups if lookups else 0.0
+        return f"{self.path.name}: {self.hits} hit(s), {self.misses} miss(es), hit ratio {ratio:.0%}"
+
+    def pull(self, storage: StorageProvider, remote_path: str) -> None:
+        """Replace the local store with the shared copy, if one exists."""
+        with self._lock:
+            self._conn.close()
+            try:
+                storage.download_directory(remote_path, self.directory)
+            except Exception as e:
+                logger.warning(f"Could not pull cache from {remote_path}: {e}")
+            self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+
+    def push(self, storage: StorageProvider, remote_path: str) -> None:
+        """Upload the local store so other tasks can share it."""
+        with self._lock:
+            self._conn.commit()
+            try:
+                storage.upload_directory(self.directory, remote_path)
+            except Exception as e:
+                logger.warning(f"Could not push cache to {remote_path}: {e}")
+
+
+class LLMResponseCache(SQLiteLRUCache):
+    """Cache of structured LLM responses keyed by model, schema and rendered prompt."""
+
+    def __init__(self, directory: str, max_mb: int) -> None:
+        super().__init__(directory, "llm_responses.sqlite", max_mb)
+
+    def make_key(
+        self,
+        model_id: str,
+        schema_name: str,
+        messages: list,
+        temperature: Optional[float],
+    ) -> str:
+        return content_hash(
+            model_id, schema_name, render_messages(messages), temperature
+        )
+
+
+class EmbeddingCache(SQLiteLRUCache):
+    """Cache of embedding vectors keyed by embedding model and text."""
+
+    def __init__(self, directory: str, max_mb: int) -> None:
+        super().__init__(directory, "embeddings.sqlite", max_mb)
+
+    def make_key(self, model_name: str, text: str) -> str:
+        return content_hash(model_name, text)
+
+    def get_vector(self, key: str) -> Optional[list[float]]:
+        value = self.get(key)
+        return array("d", value).tolist() if value is not None else None
+
+    def set_vector(self, key: str, vector: list[float]) -> None:
+        self.set(key, array("d", vector).tobytes())
+
+
+class CachedEmbeddings(Embeddings):
+    """Embeddings wrapper that serves repeated texts from an EmbeddingCache.
+
+    Texts missing from the cache are embedded together in a single provider call.
+    """
+
+    def __init__(self, embeddings: Embeddings, cache: EmbeddingCache, model_name: str) -> None:
+        self.embeddings = embeddings
+        self.cache = cache
+        self.model_name = model_name
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        keys = [self.cache.make_key(self.model_name, text) for text in texts]
+        vectors = {key: self.cache.get_vector(key) for key in set(keys)}
+
+        misses = {key: text for key, text in zip(keys, texts) if vectors[key] is None}
+        if misses:
+            logger.info(f" Embedding {len(misses)} of {len(texts)} text(s) not in the embedding cache")
+            for key, vector in zip(
+                misses, self.embeddings.embed_documents(list(misses.values()))
+            ):
+                self.cache.set_vector(key, vector)
+                vectors[key] = vector
+        return [vectors[key] for key in keys]
+
+    def embed_query(self, text: str) -> list[float]:
+        key = self.cache.make_key(self.model_name, text)
+        vector = self.cache.get_vector(key)
+        if vector is None:
+            vector = self.embeddings.embed_query(text)
+            self.cache.set_vector(key, vector)
+        return vector
@@ -0,0 +1,55 @@
+import json
+import logging
+from pathlib import Path
+from typing import Any, Optional
+
+from src.interfaces.storage_provider import StorageProvider
+from src.services.storage import safe_path_component
+
+logger = logging.getLogger(__name__)
+
+
+class CheckpointStore:
+    """Persists the output of completed pipeline stages so an interrupted run can resume.
+
+    Checkpoints are JSON files under <local_dir>/<name>/<timestamp>/ and, when a
+    storage provider is given, are mirrored to <remote_path>/<name>/<timestamp>/.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        timestamp: str,
+        local_dir: str,
+        storage: Optional[StorageProvider] = None,
+        remote_path: Optional[str] = None,
+    ) -> None:
+        run_key = f"{safe_path_component(name)}/{safe_path_component(timestamp)}"
+        self.local_path = Path(local_dir) / run_key
+        self.local_path.mkdir(parents=True, exist_ok=True)
+        self.storage = storage if remote_path else None
+        self.remote_path = f"{remote_path}/{run_key}" if remote_path else None
+
+        if self.storage:
+            try:
+                self.storage.download_directory(self.remote_path, self.local_path)
+            except Exception as e:
+                logger.info(f" No remote checkpoints restored for {run_key}: {e}")
+
+    def _stage_path(self, stage: str) -> Path:
+        return self.local_path / f"{safe_path_component(stage)}.json"
+
+    def load(self, stage: str) -> Optional[Any]:
+        path = self._stage_path(stage)
+        if not path.exists():
+            return None
+        return json.loads(path.read_text())
+
+    def save(self, stage: str, data: Any) -> None:
+        path = self._stage_path(stage)
+        path.write_text(json.dumps(data))
+        if self.storage:
+            try:
+                self.storage.upload_file(path, f"{self.remote_path}/{path.name}")
+            except Exception as e:
+                logger.warning(f"Could not upload checkpoint {stage}: {e}")
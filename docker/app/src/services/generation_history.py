@@ -0,0 +1,94 @@
+import logging
+import threading
+from concurrent.futures import Future
+from typing import Optional, Tuple
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from src.concurrency import run_in_background
+from src.models.params import FunctionGuidelines
+from src.models.pynamodb_models import GenerationOutputModel
+from src.utils import normalize_rows
+
+logger = logging.getLogger(__name__)
+
+
+class GenerationHistory:
+    """Index of past generations in the output table, embedded by purpose and services.
+
+    The table is scanned at most once per process, reading only items that carry an
+    embedding; the resulting index is shared by every agent in the process and
+    extended with outputs written since.
+    """
+
+    _index_lock = threading.Lock()
+    _keys: Optional[list[Tuple[str, str]]] = None
+    _vectors: Optional[np.ndarray] = None
+    _prefetch: Optional[Future] = None
+
+    def __init__(self, embeddings: Embeddings) -> None:
+        self.embeddings = embeddings
+
+    @staticmethod
+    def describe(guidelines: FunctionGuidelines) -> str:
+        return f"Purpose: {guidelines.purpose}\nServices: {', '.join(guidelines.services)}"
+
+    def embed(self, guidelines: FunctionGuidelines) -> list[float]:
+        return self.embeddings.embed_query(self.describe(guidelines))
+
+    @classmethod
+    def prefetch(cls) -> None:
+        """Start loading the index in the background, if it isn't loaded or loading."""
+        with cls._index_lock:
+            if cls._keys is None and cls._prefetch is None:
+                cls._prefetch = run_in_background(cls.load_index)
+
+    @classmethod
+    def load_index(cls) -> Tuple[list[Tuple[str, str]], np.ndarray]:
+        with cls._index_lock:
+            if cls._keys is not None:
+                return cls._keys, cls._vectors
+
+            keys, vectors = [], []
+            for item in GenerationOutputModel.scan(
+                filter_condition=GenerationOutputModel.purpose_embedding.exists(),
+                attributes_to_get=["pk", "sk", "purpose_embedding"],
+                page_size=100,
+            ):
+                if item.purpose_embedding:
+                    keys.append((item.pk, item.sk))
+                    vectors.append(item.purpose_embedding)
+            logger.info(f" Loaded {len(keys)} embedded past generation(s)")
+
+            cls._keys = keys
+            cls._vectors = normalize_rows(vectors) if vectors else None
+            return cls._keys, cls._vectors
+
+    @classmethod
+    def remember(cls, key: Tuple[str, str], embedding: list[float]) -> None:
+        """Add a newly written output to the loaded index."""
+        with cls._index_lock:
+            if cls._keys is None or not embedding:
+                return
+            vector = normalize_rows([embedding])
+            cls._keys.append(key)
+            cls._vectors = vector if cls._vectors is None else np.vstack([cls._vectors, vector])
+
+    def find_similar(
+        self, query_embedding: list[float], threshold: float
+    ) -> Optional[Tuple[GenerationOutputModel, float]]:
+        """Return the closest past generation scoring at least threshold, if any."""
+        keys, vectors = self.load_index()
+        if not keys:
+            logger.info(" No embedded past generations found")
+            return None
+
+        scores = vectors @ normalize_rows(query_embedding)
+        best = int(np.argmax(scores))
+        best_key, best_score = keys[best], float(scores[best])
+
+        logger.info(f" Closest past generation {best_key} scored {best_score:.3f}")
+        if best_score < threshold:
+            return None
+        return GenerationOutputModel.get(*best_key), best_score
@@ -0,0 +1,60 @@
+import ast
+import json
+import logging
+import textwrap
+import threading
+from pathlib import Path
+
+from src.services.cache import content_hash
+
+logger = logging.getLogger(__name__)
+
+
+def normalized_source_hash(source: str, summarize: bool) -> str:
+    """Hash of a function's syntax tree, so formatting and comment edits don't count as changes."""
+    try:
+        normalized = ast.dump(ast.parse(textwrap.dedent(source)))
+    except SyntaxError:
+        normalized = source
+    return content_hash(normalized, summarize)
+
+
+class IngestionManifest:
+    """Maps each ingested function path to the hash of the source it was embedded from.
+
+    Lives next to the vector DB so it is uploaded and downloaded with it. Hashes of
+    functions seen during a run are only persisted by commit(), once their
+    documents have been upserted.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = Path(path)
+        self.hashes = json.loads(self.path.read_text()) if self.path.exists() else {}
+        self.pending = {}
+        self.failed = []
+        self.skipped = 0
+        self._lock = threading.Lock()
+
+    def changed(self, function_path: str, source: str, summarize: bool) -> bool:
+        """Whether the function is new or changed since it was last ingested."""
+        source_hash = normalized_source_hash(source, summarize)
+        with self._lock:
+            if self.hashes.get(function_path) == source_hash:
+                self.skipped += 1
+                return False
+            self.pending[function_path] = source_hash
+            return True
+
+    def discard(self, function_path: str) -> None:
+        """Record a function that failed to process, so it is not marked as ingested."""
+        with self._lock:
+            self.pending.pop(function_path, None)
+            self.failed.append(function_path)
+
+    def commit(self) -> None:
+        with self._lock:
+            self.hashes.update(self.pending)
+            self.pending = {}
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self.path.write_text(json.dumps(self.hashes, indent=2, sort_keys=True))
+        logger.info(f" Ingestion manifest updated with {len(self.hashes)} function(s)")
@@ -0,0 +1,121 @@
+import json
+import logging
+import threading
+import time
+from pathlib import Path
+from typing import Tuple, Type
+
+from langchain_core.embeddings import Embeddings
+from pydantic import BaseModel
+
+from src.services.cache import content_hash, render_messages
+
+logger = logging.getLogger(__name__)
+
+
+class FixtureStore:
+    """Recorded structured LLM responses and embedding vectors for offline replay.
+
+    Fixtures are appended to a JSONL file as they are recorded. Responses are keyed
+    by schema and rendered messages, embeddings by embedded text, so a recording
+    replays regardless of which model produced it.
+    """
+
+    def __init__(self, path: str, latency_ms: int = 0) -> None:
+        self.path = Path(path)
+        self.latency = latency_ms / 1000
+        self.responses = {}
+        self.vectors = {}
+        self._lock = threading.Lock()
+
+        if self.path.exists():
+            with open(self.path, "r") as f:
+                for line in f:
+                    record = json.loads(line)
+                    target = self.responses if record["kind"] == "response" else self.vectors
+                    target[record["key"]] = record["value"]
+            logger.info(
+                f" Loaded {len(self.responses)} response(s) and {len(self.vectors)} embedding(s) from {self.path}"
+            )
+
+    @staticmethod
+    def response_key(schema_name: str, messages: list) -> str:
+        return content_hash(schema_name, render_messages(messages))
+
+    @staticmethod
+    def embedding_key(text: str) -> str:
+        return content_hash(text)
+
+    def _append(self, kind: str, key: str, value) -> None:
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, "a") as f:
+                f.write(json.dumps({"kind": kind, "key": key, "value": value}) + "\n")
+            (self.responses if kind == "response" else self.vectors)[key] = value
+
+    def record_response(
+        self, schema_name: str, messages: list, response: BaseModel, usage: dict
+    ) -> None:
+        self._append(
+            "response",
+            self.response_key(schema_name, messages),
+            {"response": response.model_dump(mode="json"), "usage": usage},
+        )
+
+    def replay_response(
+        self, schema: Type[BaseModel], messages: list
+    ) -> Tuple[BaseModel, dict]:
+        time.sleep(self.latency)
+        recorded = self.responses.get(self.response_key(schema.__name__, messages))
+        if recorded is None:
+            raise KeyError(
+                f"No recorded {schema.__name__} response for this prompt in {self.path}; re-record the fixtures"
+            )
+        return schema.model_validate(recorded["response"]), recorded["usage"]
+
+    def record_vectors(self, texts: list[str], vectors: list[list[float]]) -> None:
+        for text, vector in zip(texts, vectors):
+            self._append("embedding", self.embedding_key(text), vector)
+
+    def replay_vectors(self, texts: list[str]) -> list[list[float]]:
+        time.sleep(self.latency)
+        vectors = []
+        for text in texts:
+            vector = self.vectors.get(self.embedding_key(text))
+            if vector is None:
+                raise KeyError(
+                    f"No recorded embedding for {text[:40]!r} in {self.path}; re-record the fixtures"
+                )
+            vectors.append(vector)
+        return vectors
+
+
+class RecordingEmbeddings(Embeddings):
+    """Embeddings wrapper that records every vector it returns."""
+
+    def __init__(self, embeddings: Embeddings, fixtures: FixtureStore) -> None:
+        self.embeddings = embeddings
+        self.fixtures = fixtures
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        vectors = self.embeddings.embed_documents(texts)
+        self.fixtures.record_vectors(texts, vectors)
+        return vectors
+
+    def embed_query(self, text: str) -> list[float]:
+        vector = self.embeddings.embed_query(text)
+        self.fixtures.record_vectors([text], [vector])
+        return vector
+
+
+class ReplayEmbeddings(Embeddings):
+    """Embeddings served from recorded fixtures."""
+
+    def __init__(self, fixtures: FixtureStore) -> None:
+        self.fixtures = fixtures
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return self.fixtures.replay_vectors(texts)
+
+    def embed_query(self, text: str) -> list[float]:
+        return self.fixtures.replay_vectors([text])[0]
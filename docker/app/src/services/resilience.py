@@ -0,0 +1,176 @@
+import logging
+import random
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+R = TypeVar("R")
+
+RETRYABLE_STATUS_CODES = {408, 429, 500, 502, 503, 504, 529}
+RETRYABLE_ERROR_NAMES = {
+    # botocore ClientError codes returned by Bedrock
+    "ThrottlingException",
+    "TooManyRequestsException",
+    "ServiceUnavailableException",
+    "InternalServerException",
+    "ModelNotReadyException",
+    "ModelTimeoutException",
+    # botocore transport errors, which don't subclass the builtin timeout or connection errors
+    "HTTPClientError",
+    "ReadTimeoutError",
+    "ConnectTimeoutError",
+    "EndpointConnectionError",
+    "ConnectionClosedError",
+    # openai exception classes
+    "RateLimitError",
+    "APITimeoutError",
+    "APIConnectionError",
+    "InternalServerError",
+}
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised when a provider's circuit is open and calls are being short-circuited."""
+
+
+def _error_code(error: Exception) -> Optional[str]:
+    response = getattr(error, "response", None)
+    if isinstance(response, dict):
+        return response.get("Error", {}).get("Code")
+    return None
+
+
+def _status_code(error: Exception) -> Optional[int]:
+    status = getattr(error, "status_code", None)
+    if status is None:
+        response = getattr(error, "response", None)
+        if isinstance(response, dict):
+            status = response.get("ResponseMetadata", {}).get("HTTPStatusCode")
+        else:
+            status = getattr(response, "status_code", None)
+    return status
+
+
+def is_retryable(error: Exception) -> bool:
+    """Whether error is a throttling, timeout or transient server error."""
+    if isinstance(error, (TimeoutError, ConnectionError)):
+        return True
+    if any(cls.__name__ in RETRYABLE_ERROR_NAMES for cls in type(error).__mro__):
+        return True
+    if _error_code(error) in RETRYABLE_ERROR_NAMES:
+        return True
+    return _status_code(error) in RETRYABLE_STATUS_CODES
+
+
+def retry_after(error: Exception) -> Optional[float]:
+    """Seconds the provider asked us to wait before retrying, if it said."""
+    response = getattr(error, "response", None)
+    if isinstance(response, dict):
+        headers = response.get("ResponseMetadata", {}).get("HTTPHeaders", {})
+    else:
+        headers = getattr(response, "headers", None) or {}
+    value = headers.get("retry-after") or headers.get("Retry-After")
+    try:
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+@dataclass
+class RetryStats:
+    """Retries and seconds spent backing off, accumulated across calls."""
+
+    retries: int = 0
+    backoff: float = 0.0
+
+
+class CircuitBreaker:
+    """Stops calling a provider after consecutive failures until a cool-down passes.
+
+    After failure_threshold consecutive failures the circuit opens and calls fail
+    fast for reset_seconds. The next call is then let through as a trial; success
+    closes the circuit and another failure opens it again.
+    """
+
+    def __init__(self, name: str, failure_threshold: int, reset_seconds: float) -> None:
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self) -> bool:
+        with self._lock:
+            return (
+                self.opened_at is not None
+                and time.time() - self.opened_at < self.reset_seconds
+            )
+
+    def check(self) -> None:
+        if self.is_open:
+            raise CircuitOpenError(f"Circuit for {self.name} is open")
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self.failures >= self.failure_threshold:
+                if self.opened_at is None:
+                    logger.warning(
+                        f" Opening circuit for {self.name} after {self.failures} failure(s)"
+                    )
+                self.opened_at = time.time()
+
+
+class RetryPolicy:
+    """Jittered exponential backoff for transient model provider errors."""
+
+    def __init__(self, max_retries: int, base_delay: float, max_delay: float) -> None:
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def delay(self, attempt: int, error: Exception) -> float:
+        """Full jitter backoff, never shorter than the provider's Retry-After."""
+        backoff = random.uniform(0, min(self.max_delay, self.base_delay * 2**attempt))
+        return max(backoff, retry_after(error) or 0.0)
+
+    def call(
+        self, fn: Callable[[], R], breaker: CircuitBreaker, stats: RetryStats
+    ) -> R:
+        """Call fn through breaker, retrying transient errors.
+
+        Retries and backoff time are added to stats, including when the call
+        ultimately fails.
+        """
+        retries = 0
+        while True:
+            breaker.check()
+            try:
+                result = fn()
+            except Exception as e:
+                if not is_retryable(e):
+                    raise
+                breaker.record_failure()
+                if retries >= self.max_retries or breaker.is_open:
+                    raise
+                delay = self.delay(retries, e)
+                logger.warning(
+                    f" Transient error from {breaker.name} ({type(e).__name__}), retrying in {delay:.1f}s"
+                )
+                time.sleep(delay)
+                retries += 1
+                stats.retries += 1
+                stats.backoff += delay
+                continue
+            breaker.record_success()
+            return result
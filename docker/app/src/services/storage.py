@@ -1,4 +1,7 @@
+import fnmatch
 import logging
+import re
+import shutil
 import subprocess
 from pathlib import Path
 from typing import List, Optional
@@ -8,6 +11,15 @@ from src.config.settings import Settings
 
 logger = logging.getLogger(__name__)
 
+
+def safe_path_component(value: str) -> str:
+    """value as a single file or key name, so it can't add or climb path levels."""
+    component = re.sub(r"[^A-Za-z0-9_.-]", "_", value)
+    if not component.strip("."):
+        return component.replace(".", "_") or "_"
+    return component
+
+
 class S3StorageProvider(StorageProvider):
     """S3 implementation of the storage provider interface."""
     
@@ -30,6 +42,15 @@ class S3StorageProvider(StorageProvider):
             f"s3://{self.settings.bucket}/{destination}/"
         )
         
+    def upload_file(self, source: Path, destination: str) -> None:
+        """Upload a single file to S3."""
+        logger.info(f"Uploading {source} to s3://{self.settings.bucket}/{destination}")
+        self._run_aws_command([
+            "aws", "s3", "cp",
+            str(source),
+            f"s3://{self.settings.bucket}/{destination}"
+        ])
+        
     def delete_directory(self, path: str) -> None:
         """Delete a directory from S3."""
         logger.info(f"Deleting directory {path} from bucket {self.settings.bucket}")
@@ -88,3 +109,56 @@ class S3StorageProvider(StorageProvider):
         except subprocess.CalledProcessError as e:
             logger.error(f"AWS command failed: {e.stderr}")
             raise RuntimeError(f"AWS operation failed: {e.stderr}") from e
+
+
+class LocalStorageProvider(StorageProvider):
+    """Local directory implementation of the storage provider interface.
+
+    Mirrors the bucket layout under local_storage_root so the pipelines can run
+    offline, e.g. when profiling against replayed model fixtures.
+    """
+
+    def __init__(self, settings=None):
+        self.settings = settings or Settings.get_settings().storage
+        self.root = Path(self.settings.local_storage_root)
+
+    def download_directory(self, source: str, destination: Path) -> None:
+        """Copy a directory out of local storage."""
+        logger.info(f"Copying {self.root / source} to {destination}")
+        if (self.root / source).exists():
+            shutil.copytree(self.root / source, destination, dirs_exist_ok=True)
+
+    def upload_directory(self, source: Path, destination: str) -> None:
+        """Copy a directory into local storage."""
+        logger.info(f"Copying {source} to {self.root / destination}")
+        shutil.copytree(source, self.root / destination, dirs_exist_ok=True)
+
+    def upload_file(self, source: Path, destination: str) -> None:
+        """Copy a single file into local storage."""
+        (self.root / destination).parent.mkdir(parents=True, exist_ok=True)
+        shutil.copy2(source, self.root / destination)
+
+    def delete_directory(self, path: str) -> None:
+        """Delete a directory from local storage."""
+        logger.info(f"Deleting directory {self.root / path}")
+        shutil.rmtree(self.root / path, ignore_errors=True)
+
+    def delete_files(self, files: List[str]) -> None:
+        """Delete specific files from local storage."""
+        for file in files:
+            (self.root / file).unlink(missing_ok=True)
+
+    def list_files(self, directory: str, pattern: Optional[str] = None) -> List[str]:
+        """List files in a local storage directory, optionally filtered by pattern."""
+        return [
+            str(path.relative_to(self.root))
+            for path in (self.root / directory).rglob("*")
+            if path.is_file() and (not pattern or fnmatch.fnmatch(path.name, pattern))
+        ]
+
+
+def get_storage_provider() -> StorageProvider:
+    """Storage provider selected by the storage settings."""
+    if Settings.get_settings().storage.storage_provider == "local":
+        return LocalStorageProvider()
+    return S3StorageProvider()
@@ -0,0 +1,184 @@
+import json
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass, field
+from functools import wraps
+from itertools import count
+from pathlib import Path
+from typing import Callable, Iterator, Optional
+
+from src.services.storage import safe_path_component
+
+logger = logging.getLogger(__name__)
+
+_current_span: ContextVar[Optional["Span"]] = ContextVar("current_span", default=None)
+_current_tracer: ContextVar[Optional["Tracer"]] = ContextVar(
+    "current_tracer", default=None
+)
+_lock = threading.Lock()
+
+
+@dataclass
+class Span:
+    """A timed pipeline stage with the LLM usage recorded while it was active."""
+
+    name: str
+    span_id: int
+    parent_id: Optional[int]
+    start: float
+    end: Optional[float] = None
+    attributes: dict = field(default_factory=dict)
+    llm_calls: int = 0
+    prompt_tokens: int = 0
+    cached_prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cache_hits: int = 0
+    retries: int = 0
+    backoff: float = 0.0
+
+    @property
+    def duration(self) -> float:
+        return (self.end or time.time()) - self.start
+
+    def to_dict(self) -> dict:
+        return {**asdict(self), "duration": round(self.duration, 4)}
+
+
+def record_llm_call(
+    prompt_tokens: int = 0,
+    completion_tokens: int = 0,
+    cache_hit: bool = False,
+    cached_prompt_tokens: int = 0,
+    retries: int = 0,
+    backoff: float = 0.0,
+) -> None:
+    """Attribute one LLM call to the innermost active span, if any."""
+    span = _current_span.get()
+    if span is None:
+        return
+    with _lock:
+        span.llm_calls += 1
+        span.prompt_tokens += prompt_tokens
+        span.cached_prompt_tokens += cached_prompt_tokens
+        span.completion_tokens += completion_tokens
+        span.cache_hits += int(cache_hit)
+        span.retries += retries
+        span.backoff = round(span.backoff + backoff, 3)
+
+
+def set_attributes(**attributes) -> None:
+    """Set attributes on the innermost active span, if any."""
+    span = _current_span.get()
+    if span is not None:
+        with _lock:
+            span.attributes.update(attributes)
+
+
+@contextmanager
+def span(name: str, **attributes) -> Iterator[Optional[Span]]:
+    """Open a span on the active tracer; a no-op outside of a traced run."""
+    tracer = _current_tracer.get()
+    if tracer is None:
+        yield None
+        return
+    with tracer.span(name, **attributes) as active:
+        yield active
+
+
+def traced(name: str) -> Callable:
+    """Decorator running the wrapped function inside a span."""
+
+    def decorator(fn: Callable) -> Callable:
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+class Tracer:
+    """Collects nested spans for one pipeline run and writes them as a JSON trace."""
+
+    def __init__(self, name: str, run_id: str) -> None:
+        self.name = name
+        self.run_id = run_id
+        self.spans: list[Span] = []
+        self._ids = count(1)
+
+    @contextmanager
+    def span(self, name: str, **attributes) -> Iterator[Span]:
+        parent = _current_span.get()
+        with _lock:
+            span = Span(
+                name=name,
+                span_id=next(self._ids),
+                parent_id=parent.span_id if parent else None,
+                start=time.time(),
+                attributes=attributes,
+            )
+            self.spans.append(span)
+        span_token = _current_span.set(span)
+        tracer_token = _current_tracer.set(self)
+        try:
+            yield span
+        except Exception as e:
+            span.attributes["error"] = repr(e)
+            raise
+        finally:
+            span.end = time.time()
+            _current_tracer.reset(tracer_token)
+            _current_span.reset(span_token)
+
+    def summary(self) -> dict:
+        """Aggregate duration and usage per stage name."""
+        stages = {}
+        for span in self.spans:
+            stage = stages.setdefault(
+                span.name,
+                {
+                    "count": 0,
+                    "duration": 0.0,
+                    "llm_calls": 0,
+                    "prompt_tokens": 0,
+                    "cached_prompt_tokens": 0,
+                    "completion_tokens": 0,
+                    "cache_hits": 0,
+                    "retries": 0,
+                    "backoff": 0.0,
+                },
+            )
+            stage["count"] += 1
+            stage["duration"] = round(stage["duration"] + span.duration, 4)
+            for key in (
+                "llm_calls",
+                "prompt_tokens",
+                "cached_prompt_tokens",
+                "completion_tokens",
+                "cache_hits",
+                "retries",
+            ):
+                stage[key] += getattr(span, key)
+            stage["backoff"] = round(stage["backoff"] + span.backoff, 3)
+        return stages
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "run_id": self.run_id,
+            "spans": [span.to_dict() for span in self.spans],
+            "summary": self.summary(),
+        }
+
+    def write(self, directory: str) -> Path:
+        filename = f"{safe_path_component(self.name)}_{safe_path_component(self.run_id)}.json"
+        path = Path(directory) / filename
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(self.to_dict(), indent=2))
+        logger.info(f" Trace written to {path}")
+        return path
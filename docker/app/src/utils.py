@@ -0,0 +1,13 @@
+import numpy as np
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count of text, at about 4 characters per token."""
+    return len(text) // 4
+
+
+def normalize_rows(vectors) -> np.ndarray:
+    """Vectors scaled to unit length along the last axis; zero vectors are left as is."""
+    vectors = np.asarray(vectors, dtype=float)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
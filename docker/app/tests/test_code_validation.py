@@ -0,0 +1,61 @@
+import pytest
+
+from src.code_validation import validate_code
+
+pytest.importorskip("botocore.session")
+
+
+def test_clients_are_resolved_per_function():
+    code = '''import boto3
+
+
+def describe(cluster_name):
+    client = boto3.client("eks")
+    return client.describe_cluster(name=cluster_name)
+
+
+def roles():
+    client = boto3.client("iam")
+    return client.list_roles()
+'''
+    assert validate_code(code) == []
+
+
+def test_missing_method_is_reported_for_the_local_client():
+    code = '''import boto3
+
+
+def roles():
+    client = boto3.client("iam")
+    return client.describe_cluster(name="x")
+'''
+    assert validate_code(code) == [
+        "boto3 'iam' client has no method 'describe_cluster' (line 6)"
+    ]
+
+
+def test_module_client_is_visible_in_functions():
+    code = '''import boto3
+
+client = boto3.client("eks")
+
+
+def describe(cluster_name):
+    return client.describe_clusters(name=cluster_name)
+'''
+    assert validate_code(code) == [
+        "boto3 'eks' client has no method 'describe_clusters' (line 7)"
+    ]
+
+
+def test_name_bound_to_several_services_is_skipped():
+    code = '''import boto3
+
+
+def describe(cluster_name, use_iam):
+    client = boto3.client("eks")
+    if use_iam:
+        client = boto3.client("iam")
+    return client.describe_cluster(name=cluster_name)
+'''
+    assert validate_code(code) == []
@@ -0,0 +1,93 @@
+import pytest
+
+pytest.importorskip("langchain_aws")
+pytest.importorskip("langchain_openai")
+
+from langchain_aws import ChatBedrockConverse
+from langchain_core.messages import HumanMessage
+from langchain_openai import ChatOpenAI
+
+from src.config.model_manager import ModelManager
+
+
+class FakeBedrockRuntime:
+    """Returns a canned Converse response in place of the bedrock-runtime client."""
+
+    def __init__(self, usage: dict) -> None:
+        self.usage = usage
+
+    def converse(self, **kwargs) -> dict:
+        return {
+            "ResponseMetadata": {"HTTPStatusCode": 200},
+            "output": {"message": {"role": "assistant", "content": [{"text": "ok"}]}},
+            "stopReason": "end_turn",
+            "usage": self.usage,
+            "metrics": {"latencyMs": 100},
+        }
+
+
+class FakeChatCompletions:
+    """Returns a canned chat completion in place of the openai client."""
+
+    def __init__(self, usage: dict) -> None:
+        self.usage = usage
+
+    def create(self, **kwargs) -> dict:
+        return {
+            "id": "chatcmpl-1",
+            "model": "gpt-4o",
+            "choices": [
+                {
+                    "index": 0,
+                    "message": {"role": "assistant", "content": "ok"},
+                    "finish_reason": "stop",
+                }
+            ],
+            "usage": self.usage,
+        }
+
+
+def test_bedrock_cache_read_tokens():
+    chat = ChatBedrockConverse(
+        model="anthropic.claude-3-5-sonnet-20240620-v1:0",
+        region_name="us-east-1",
+        client=FakeBedrockRuntime(
+            {
+                "inputTokens": 20,
+                "outputTokens": 2,
+                "totalTokens": 1049,
+                "cacheReadInputTokens": 7,
+                "cacheWriteInputTokens": 1020,
+            }
+        ),
+    )
+    raw = chat.invoke([HumanMessage("hi")])
+    assert ModelManager._cached_tokens(raw) == 7
+
+
+def test_openai_cached_tokens():
+    chat = ChatOpenAI(
+        model="gpt-4o",
+        api_key="test",
+        client=FakeChatCompletions(
+            {
+                "prompt_tokens": 1200,
+                "completion_tokens": 2,
+                "total_tokens": 1202,
+                "prompt_tokens_details": {"cached_tokens": 1024},
+            }
+        ),
+    )
+    raw = chat.invoke([HumanMessage("hi")])
+    assert ModelManager._cached_tokens(raw) == 1024
+
+
+def test_no_cached_tokens_reported():
+    chat = ChatOpenAI(
+        model="gpt-4o",
+        api_key="test",
+        client=FakeChatCompletions(
+            {"prompt_tokens": 12, "completion_tokens": 2, "total_tokens": 14}
+        ),
+    )
+    assert ModelManager._cached_tokens(chat.invoke([HumanMessage("hi")])) == 0
@@ -0,0 +1,30 @@
+import pytest
+
+from src.services.resilience import is_retryable
+
+exceptions = pytest.importorskip("botocore.exceptions")
+
+
+@pytest.mark.parametrize(
+    "error",
+    [
+        exceptions.ReadTimeoutError(endpoint_url="https://bedrock-runtime"),
+        exceptions.ConnectTimeoutError(endpoint_url="https://bedrock-runtime"),
+        exceptions.EndpointConnectionError(endpoint_url="https://bedrock-runtime"),
+        exceptions.ConnectionClosedError(endpoint_url="https://bedrock-runtime"),
+    ],
+    ids=type,
+)
+def test_botocore_transport_errors_are_retryable(error):
+    assert is_retryable(error)
+
+
+def test_client_errors_are_retryable_by_code():
+    throttled = exceptions.ClientError(
+        {"Error": {"Code": "ThrottlingException"}}, "Converse"
+    )
+    denied = exceptions.ClientError(
+        {"Error": {"Code": "AccessDeniedException"}}, "Converse"
+    )
+    assert is_retryable(throttled)
+    assert not is_retryable(denied)